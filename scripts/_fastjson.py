@@ -0,0 +1,24 @@
+"""
+Fast JSON decoding for tasks.json readers.
+
+Uses orjson if installed, then ujson, then the standard library. loads()
+accepts bytes, so callers can read files in binary mode and skip the
+text decoding layer.
+"""
+
+try:
+    import orjson
+
+    loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    try:
+        import ujson
+
+        loads = ujson.loads
+        JSONDecodeError = ValueError
+    except ImportError:
+        import json
+
+        loads = json.loads
+        JSONDecodeError = json.JSONDecodeError
@@ -1,6 +1,14 @@
 import os
+import codecs
+import mmap
+import posixpath
+import queue
+import hashlib
+import itertools
+import threading
 import chromadb
 import glob
+from rag_client import chunk_id
 
 # Configuration
 CHROMA_HOST = os.environ.get("CHROMA_HOST")
@@ -8,6 +16,12 @@ CHROMA_PORT = os.environ.get("CHROMA_PORT", "8000")
 COLLECTION_NAME = "dev_stack_codebase"
 EXTENSIONS = ["*.py", "*.md", "*.js", "*.ts", "*.html", "*.css", "*.sh", "*.yml", "*.yaml"]
 IGNORE_DIRS = [".git", ".worktrees", "node_modules", "__pycache__", ".pytest_cache", "chroma_data"]
+BATCH_SIZE = 250
+QUEUE_SIZE = 4  # Max in-flight items between pipeline stages
+# Same model as Chroma's default embedding function, so query_texts issued by
+# RAGClient stay in the same vector space as the precomputed embeddings
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+_DONE = None  # Pipeline shutdown sentinel
 
 
 def get_files(start_dir="."):
@@ -32,6 +46,59 @@ def chunk_text(text, chunk_size=1000, overlap=100):
     return chunks
 
 
+def _char_boundary(mm, pos):
+    """Move pos forward past UTF-8 continuation bytes (0b10xxxxxx)."""
+    while pos < len(mm) and mm[pos] & 0xC0 == 0x80:
+        pos += 1
+    return pos
+
+
+def _check_utf8(mm, block_size=1 << 20):
+    """Raise UnicodeDecodeError unless the mapped file is valid UTF-8."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for start in range(0, len(mm), block_size):
+        decoder.decode(mm[start:start + block_size])
+    decoder.decode(b'', final=True)
+
+
+def iter_file_chunks(filepath, chunk_size=1000, overlap=100):
+    """
+    Yield text chunks for a file; raises UnicodeDecodeError for files that
+    are not UTF-8 text, before any chunk is yielded.
+
+    Large files are memory-mapped and chunked at the byte level so the whole
+    file is never copied into a Python string. Chunk boundaries are moved off
+    multibyte characters. Files smaller than a page are simply read and
+    chunked as text.
+    """
+    if os.path.getsize(filepath) < mmap.PAGESIZE:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            yield from chunk_text(f.read(), chunk_size, overlap)
+        return
+
+    step = chunk_size - overlap
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        _check_utf8(mm)
+        for start in range(0, len(mm), step):
+            begin = _char_boundary(mm, start)
+            end = _char_boundary(mm, start + chunk_size)
+            if begin < end:
+                yield mm[begin:end].decode('utf-8')
+
+
+def load_embedder():
+    """
+    Load a local ONNX embedding model for batch embedding.
+    Returns None (Chroma embeds server-side) if fastembed is not installed.
+    """
+    try:
+        from fastembed import TextEmbedding
+    except ImportError:
+        print("fastembed not available, falling back to Chroma's embedding function.")
+        return None
+    return TextEmbedding(model_name=EMBED_MODEL, providers=["CPUExecutionProvider"])
+
+
 def connect_to_chroma():
     """
     Attempt to connect to the configured Chroma host; if not provided,
@@ -63,6 +130,152 @@ def connect_to_chroma():
     return None
 
 
+def file_metadata(filepath, chunk_index):
+    """
+    Chunk metadata. extension/dir let RAGClient filter with indexed
+    equality matches instead of substring scans over source.
+    """
+    relpath = os.path.relpath(filepath).replace(os.sep, "/")
+    return {
+        "source": filepath,
+        "chunk_index": chunk_index,
+        "extension": os.path.splitext(relpath)[1].lstrip("."),
+        "dir": posixpath.dirname(relpath),
+    }
+
+
+def read_files(files, file_queue):
+    """
+    Reader stage: push (filepath, first chunk index, chunks) for every readable
+    file, at most BATCH_SIZE chunks at a time so large files are streamed.
+    """
+    for filepath in files:
+        try:
+            chunks = iter_file_chunks(filepath)
+            first = 0
+            while True:
+                block = list(itertools.islice(chunks, BATCH_SIZE))
+                if not block:
+                    break
+                file_queue.put((filepath, first, block))
+                first += len(block)
+        except Exception as e:
+            print(f"Skipping {filepath}: {e}")
+    file_queue.put(_DONE)
+
+
+def batch_chunks(file_queue, batch_queue, stats):
+    """
+    Chunker stage: dedupe chunks and group them into upsert batches.
+
+    Identical chunks (license headers, generated code) are embedded only once;
+    the copies' (id, metadata) pairs are collected in stats["aliases"] under
+    the canonical chunk's id and upserted by upsert_aliases.
+    """
+    seen = {}  # content hash -> canonical doc id
+    ids, documents, metadatas = [], [], []
+
+    while True:
+        item = file_queue.get()
+        if item is _DONE:
+            break
+        filepath, first, chunks = item
+        for i, chunk in enumerate(chunks, first):
+            doc_id = chunk_id(filepath, i)
+            digest = hashlib.blake2b(chunk.encode('utf-8'), digest_size=16).digest()
+            canonical = seen.get(digest)
+            if canonical is not None:
+                metadata = {**file_metadata(filepath, i), "alias_of": canonical}
+                stats["aliases"].setdefault(canonical, []).append((doc_id, metadata))
+                stats["duplicates"] += 1
+                continue
+
+            seen[digest] = doc_id
+            ids.append(doc_id)
+            documents.append(chunk)
+            metadatas.append(file_metadata(filepath, i))
+
+            if len(ids) >= BATCH_SIZE:
+                batch_queue.put((ids, documents, metadatas))
+                ids, documents, metadatas = [], [], []
+
+    if ids:
+        batch_queue.put((ids, documents, metadatas))
+    batch_queue.put(_DONE)
+
+
+def upsert_batches(collection, batch_queue, stats, embedder=None):
+    """
+    Upserter stage: embed each batch in one call and send it to Chroma.
+    Without an embedder, Chroma embeds the documents itself.
+    """
+    while True:
+        item = batch_queue.get()
+        if item is _DONE:
+            break
+        if stats["errors"]:
+            # Keep draining so upstream stages are not blocked on a full queue
+            continue
+        ids, documents, metadatas = item
+        try:
+            if embedder is not None:
+                embeddings = [vec.tolist() for vec in embedder.embed(documents)]
+                collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+            else:
+                collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+        except Exception as e:
+            stats["errors"].append(e)
+            continue
+        start = stats["indexed"]
+        stats["indexed"] += len(ids)
+        print(f"  Indexed chunks {start} to {stats['indexed']}")
+
+
+def upsert_aliases(collection, stats):
+    """
+    Upsert duplicate chunks under their own ids and metadata, reusing the
+    embedding and document already stored for their canonical chunk.
+    """
+    canonical_ids = list(stats["aliases"])
+    for i in range(0, len(canonical_ids), BATCH_SIZE):
+        stored = collection.get(ids=canonical_ids[i:i + BATCH_SIZE], include=["embeddings", "documents"])
+        ids, embeddings, documents, metadatas = [], [], [], []
+        for canonical, embedding, document in zip(stored["ids"], stored["embeddings"], stored["documents"]):
+            for doc_id, metadata in stats["aliases"][canonical]:
+                ids.append(doc_id)
+                embeddings.append(embedding)
+                documents.append(document)
+                metadatas.append(metadata)
+        for j in range(0, len(ids), BATCH_SIZE):
+            collection.upsert(
+                ids=ids[j:j + BATCH_SIZE],
+                embeddings=embeddings[j:j + BATCH_SIZE],
+                documents=documents[j:j + BATCH_SIZE],
+                metadatas=metadatas[j:j + BATCH_SIZE],
+            )
+
+
+def has_legacy_chunks(collection, files):
+    """
+    Cheap check by id: the old scheme indexed chunk 0 of every file as
+    '<source>::0', so probing those ids avoids scanning the whole collection.
+    """
+    probe_ids = [f"{filepath}::0" for filepath in files]
+    for i in range(0, len(probe_ids), BATCH_SIZE):
+        if collection.get(ids=probe_ids[i:i + BATCH_SIZE], include=[])["ids"]:
+            return True
+    return False
+
+
+def remove_legacy_chunks(collection):
+    """Delete chunks indexed under the old '<source>::<index>' ID scheme."""
+    legacy_ids = [doc_id for doc_id in collection.get(include=[])["ids"] if "::" in doc_id]
+    for i in range(0, len(legacy_ids), BATCH_SIZE):
+        collection.delete(ids=legacy_ids[i:i + BATCH_SIZE])
+    if legacy_ids:
+        print(f"Removed {len(legacy_ids)} chunks with legacy IDs.")
+
+
 def main():
     collection = connect_to_chroma()
     if not collection:
@@ -71,38 +284,36 @@ def main():
     files = get_files()
     print(f"Found {len(files)} files to index.")
 
-    ids = []
-    documents = []
-    metadatas = []
+    # One-time migration; later runs only pay for the id probe
+    if has_legacy_chunks(collection, files):
+        remove_legacy_chunks(collection)
+    embedder = load_embedder()
 
-    for filepath in files:
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
+    # read -> chunk -> upsert run as a pipeline; bounded queues provide
+    # backpressure so memory stays flat while disk IO and network overlap
+    file_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    batch_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    stats = {"indexed": 0, "duplicates": 0, "aliases": {}, "errors": []}
 
-            chunks = chunk_text(content)
-            for i, chunk in enumerate(chunks):
-                doc_id = f"{filepath}::{i}"
-                ids.append(doc_id)
-                documents.append(chunk)
-                metadatas.append({"source": filepath, "chunk_index": i})
+    stages = [
+        threading.Thread(target=read_files, args=(files, file_queue), daemon=True),
+        threading.Thread(target=batch_chunks, args=(file_queue, batch_queue, stats), daemon=True),
+        threading.Thread(target=upsert_batches, args=(collection, batch_queue, stats, embedder), daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+    for stage in stages:
+        stage.join()
 
-        except Exception as e:
-            print(f"Skipping {filepath}: {e}")
+    if stats["errors"]:
+        print(f"Indexing failed: {stats['errors'][0]}")
+        return
 
-    if documents:
-        print(f"Upserting {len(documents)} chunks...")
-        # Process in batches to avoid hitting limits
-        batch_size = 100
-        for i in range(0, len(documents), batch_size):
-            batch_end = i + batch_size
-            collection.upsert(
-                ids=ids[i:batch_end],
-                documents=documents[i:batch_end],
-                metadatas=metadatas[i:batch_end]
-            )
-            print(f"  Indexed chunks {i} to {min(batch_end, len(documents))}")
+    if stats["duplicates"]:
+        upsert_aliases(collection, stats)
+        print(f"Reused embeddings for {stats['duplicates']} duplicate chunks.")
 
+    if stats["indexed"]:
         print("Indexing complete!")
     else:
         print("No documents found to index.")
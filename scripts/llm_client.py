@@ -4,15 +4,72 @@ Enhanced LLM Client with RAG Integration, Token Counting, and Retry Logic
 This module provides a robust interface to multiple LLM providers with:
 - RAG-based code context injection
 - Token counting and budget management
-- Automatic retry with exponential backoff
+- Automatic retry of transient errors with jittered exponential backoff
 - Conversation history management
 - Streaming support (where available)
 """
 
 import os
 import sys
-from typing import List, Dict, Optional, Callable
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import functools
+from typing import List, Dict, Optional, Callable, Iterator
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception
+
+
+# Transient provider errors worth retrying, matched by class name so the
+# provider SDKs stay optional imports (openai/anthropic share these names,
+# the rest come from google.api_core). Auth, validation and context-length
+# errors are permanent and fail fast.
+RETRYABLE_ERROR_NAMES = frozenset({
+    "RateLimitError",
+    "APIConnectionError",
+    "APITimeoutError",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+})
+MAX_RETRY_AFTER = 60  # seconds
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Return True for rate-limit, connection and timeout errors."""
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(exc).__mro__)
+
+
+def _retry_after_seconds(exc: Optional[BaseException]) -> Optional[float]:
+    """Extract the server-provided Retry-After delay from an API error, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return min(max(float(value), 0.0), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return None
+
+
+_jittered_backoff = wait_random_exponential(multiplier=1, max=30)
+
+
+def _wait_retry_after_or_backoff(retry_state) -> float:
+    """Honor 429 Retry-After headers, otherwise back off exponentially with jitter."""
+    delay = _retry_after_seconds(retry_state.outcome.exception())
+    if delay is not None:
+        return delay
+    return _jittered_backoff(retry_state)
+
+
+retry_transient = retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=_wait_retry_after_or_backoff,
+    stop=stop_after_attempt(5),
+    reraise=True
+)
 
 
 # Abstract Interface
@@ -32,6 +89,22 @@ class LLMClient:
         """Generate text from a list of messages. Must be implemented by subclasses."""
         raise NotImplementedError
     
+    def generate_text_stream(self, prompt, system_prompt=None, **kwargs) -> Iterator[str]:
+        """
+        Stream generated text chunk by chunk.
+        Override in subclasses with native streaming support.
+        Default: yields the full response as a single chunk
+        """
+        yield self.generate_text(prompt, system_prompt, **kwargs)
+    
+    def generate_stream_with_messages(self, messages: List[Dict], **kwargs) -> Iterator[str]:
+        """
+        Stream text generated from a list of messages chunk by chunk.
+        Override in subclasses with native streaming support.
+        Default: yields the full response as a single chunk
+        """
+        yield self.generate_with_messages(messages, **kwargs)
+    
     def get_token_count(self, text: str) -> int:
         """
         Estimate token count for text.
@@ -83,6 +156,16 @@ class LLMClient:
         return self.generate_text(enhanced_prompt, system_prompt, **kwargs)
 
 
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model_name: str):
+    """Load the tiktoken encoding for a model once per process."""
+    import tiktoken
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
 # OpenAI Implementation
 class OpenAIClient(LLMClient):
     def __init__(self):
@@ -97,8 +180,7 @@ class OpenAIClient(LLMClient):
             
             # Try to import tiktoken for accurate token counting
             try:
-                import tiktoken
-                self.encoding = tiktoken.encoding_for_model(self.model)
+                self.encoding = _get_encoding(self.model)
                 self.has_tiktoken = True
             except:
                 self.has_tiktoken = False
@@ -117,12 +199,7 @@ class OpenAIClient(LLMClient):
             return len(self.encoding.encode(text))
         return super().get_token_count(text)
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
-        reraise=True
-    )
+    @retry_transient
     def generate_text(self, 
                      prompt: str, 
                      system_prompt: str = "You are a helpful AI assistant.",
@@ -174,6 +251,35 @@ class OpenAIClient(LLMClient):
             print(error_msg)
             raise  # Re-raise for retry logic
 
+    def generate_text_stream(self,
+                             prompt: str,
+                             system_prompt: str = "You are a helpful AI assistant.",
+                             temperature: float = 0.7,
+                             max_tokens: Optional[int] = None,
+                             **kwargs) -> Iterator[str]:
+        """
+        Stream text from OpenAI API as it is generated.
+        
+        Token usage is read from the final usage frame of the stream.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System instruction
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional OpenAI API parameters
+            
+        Yields:
+            Text chunks
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        yield from self.generate_stream_with_messages(
+            messages, temperature=temperature, max_tokens=max_tokens, **kwargs
+        )
+
     def generate_with_messages(self, 
                                messages: List[Dict],
                                temperature: float = 0.7,
@@ -216,6 +322,50 @@ class OpenAIClient(LLMClient):
             print(error_msg)
             raise
 
+    def generate_stream_with_messages(self,
+                                      messages: List[Dict],
+                                      temperature: float = 0.7,
+                                      max_tokens: Optional[int] = None,
+                                      **kwargs) -> Iterator[str]:
+        """
+        Stream text generated from a conversation history.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional parameters
+            
+        Yields:
+            Text chunks
+        """
+        try:
+            params = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": temperature,
+                "stream": True,
+                "stream_options": {"include_usage": True},
+            }
+            
+            if max_tokens:
+                params["max_tokens"] = max_tokens
+            
+            params.update(kwargs)
+            
+            for chunk in self.client.chat.completions.create(**params):
+                # The final frame carries usage and no choices
+                if getattr(chunk, 'usage', None):
+                    self.last_token_count = chunk.usage.total_tokens
+                    self.total_tokens_used += chunk.usage.total_tokens
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+            
+        except Exception as e:
+            error_msg = f"Error streaming text with OpenAI: {e}"
+            print(error_msg)
+            raise
+
 
 # Anthropic Implementation
 class AnthropicClient(LLMClient):
@@ -235,12 +385,7 @@ class AnthropicClient(LLMClient):
             print(f"Error: {e}")
             sys.exit(1)
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
-        reraise=True
-    )
+    @retry_transient
     def generate_text(self, 
                      prompt: str, 
                      system_prompt: str = "You are a helpful AI assistant.",
@@ -272,6 +417,21 @@ class AnthropicClient(LLMClient):
             print(error_msg)
             raise
 
+    def generate_text_stream(self,
+                             prompt: str,
+                             system_prompt: str = "You are a helpful AI assistant.",
+                             temperature: float = 0.7,
+                             max_tokens: int = 4096,
+                             **kwargs) -> Iterator[str]:
+        """Stream text from Anthropic API as it is generated."""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        yield from self.generate_stream_with_messages(
+            messages, temperature=temperature, max_tokens=max_tokens, **kwargs
+        )
+
     def generate_with_messages(self, 
                                messages: List[Dict],
                                temperature: float = 0.7,
@@ -309,6 +469,43 @@ class AnthropicClient(LLMClient):
             print(error_msg)
             raise
 
+    def generate_stream_with_messages(self,
+                                      messages: List[Dict],
+                                      temperature: float = 0.7,
+                                      max_tokens: int = 4096,
+                                      **kwargs) -> Iterator[str]:
+        """Stream text generated from conversation history."""
+        try:
+            # Anthropic requires system prompt separate
+            system_prompt = "You are a helpful AI assistant."
+            filtered_messages = []
+            
+            for msg in messages:
+                if msg['role'] == 'system':
+                    system_prompt = msg['content']
+                else:
+                    filtered_messages.append(msg)
+            
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=max_tokens,
+                system=system_prompt,
+                temperature=temperature,
+                messages=filtered_messages,
+                **kwargs
+            ) as stream:
+                yield from stream.text_stream
+                message = stream.get_final_message()
+            
+            if hasattr(message, 'usage'):
+                self.last_token_count = message.usage.input_tokens + message.usage.output_tokens
+                self.total_tokens_used += self.last_token_count
+            
+        except Exception as e:
+            error_msg = f"Error streaming text with Anthropic: {e}"
+            print(error_msg)
+            raise
+
 
 # Google Gemini Implementation
 class GoogleClient(LLMClient):
@@ -330,12 +527,7 @@ class GoogleClient(LLMClient):
             print(f"Error: {e}")
             sys.exit(1)
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
-        reraise=True
-    )
+    @retry_transient
     def generate_text(self, 
                      prompt: str, 
                      system_prompt: str = "You are a helpful AI assistant.",
@@ -372,6 +564,43 @@ class GoogleClient(LLMClient):
             print(error_msg)
             raise
 
+    def generate_text_stream(self,
+                             prompt: str,
+                             system_prompt: str = "You are a helpful AI assistant.",
+                             temperature: float = 0.7,
+                             max_tokens: Optional[int] = None,
+                             **kwargs) -> Iterator[str]:
+        """Stream text from Google Gemini API as it is generated."""
+        try:
+            full_prompt = f"{system_prompt}\n\n{prompt}"
+            
+            generation_config = {
+                "temperature": temperature,
+            }
+            if max_tokens:
+                generation_config["max_output_tokens"] = max_tokens
+            
+            response = self.model.generate_content(
+                full_prompt,
+                generation_config=generation_config,
+                stream=True
+            )
+            
+            for chunk in response:
+                yield chunk.text
+            
+            # Usage metadata is populated once the stream is exhausted
+            try:
+                self.last_token_count = response.usage_metadata.total_token_count
+                self.total_tokens_used += self.last_token_count
+            except:
+                pass
+            
+        except Exception as e:
+            error_msg = f"Error streaming text with Google Gemini: {e}"
+            print(error_msg)
+            raise
+
     def generate_with_messages(self, 
                                messages: List[Dict],
                                temperature: float = 0.7,
@@ -404,12 +633,54 @@ class GoogleClient(LLMClient):
             print(error_msg)
             raise
 
+    def generate_stream_with_messages(self,
+                                      messages: List[Dict],
+                                      temperature: float = 0.7,
+                                      max_tokens: Optional[int] = None,
+                                      **kwargs) -> Iterator[str]:
+        """Stream text generated from conversation history."""
+        try:
+            chat = self.model.start_chat(history=[])
+            
+            # Build prompt from messages
+            combined_prompt = "".join(
+                f"[{msg['role'].upper()}]: {msg['content']}\n\n" for msg in messages
+            )
+            
+            generation_config = {"temperature": temperature}
+            if max_tokens:
+                generation_config["max_output_tokens"] = max_tokens
+            
+            response = chat.send_message(
+                combined_prompt,
+                generation_config=generation_config,
+                stream=True
+            )
+            
+            for chunk in response:
+                yield chunk.text
+            
+            # Usage metadata is populated once the stream is exhausted
+            try:
+                self.last_token_count = response.usage_metadata.total_token_count
+                self.total_tokens_used += self.last_token_count
+            except:
+                pass
+            
+        except Exception as e:
+            error_msg = f"Error streaming text with Google Gemini: {e}"
+            print(error_msg)
+            raise
+
 
 # Factory Function
 def get_llm_client(**kwargs) -> LLMClient:
     """
     Get an LLM client based on environment configuration.
     
+    Clients are shared per provider, so repeated calls reuse the same
+    instance (and its HTTP connection pool).
+    
     Args:
         **kwargs: Additional configuration parameters
         
@@ -417,7 +688,12 @@ def get_llm_client(**kwargs) -> LLMClient:
         LLMClient instance
     """
     provider = os.environ.get("LLM_PROVIDER", "openai").lower()
-    
+    return _create_client(provider)
+
+
+@functools.lru_cache(maxsize=None)
+def _create_client(provider: str) -> LLMClient:
+    """Instantiate the client for a provider (memoized by get_llm_client)."""
     if provider == "openai":
         return OpenAIClient()
     elif provider == "anthropic":
@@ -5,18 +5,72 @@ This module provides a dedicated interface to ChromaDB for semantic code search.
 Agents use this to find relevant code snippets before making changes.
 """
 
+import asyncio
+import io
 import os
+import json
+import logging
+import posixpath
+import time
 import chromadb
+import numpy as np
+from collections import OrderedDict
 from typing import List, Dict, Optional
 
 
+logger = logging.getLogger("rag_client")
+_log_level = logging.getLevelName(
+    (os.environ.get("DEV_STACK_LOG_LEVEL") or os.environ.get("LOG_LEVEL") or "").upper()
+)
+if isinstance(_log_level, int):
+    # Explicitly requested: attach a handler, since records below WARNING would
+    # otherwise only reach logging.lastResort and be dropped. Without the
+    # variables, output follows the caller's logging configuration.
+    logger.setLevel(_log_level)
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+
+# Characters format_for_llm adds around each snippet's source and content
+SNIPPET_OVERHEAD = len("### Source: \n```\n\n```\n\n")
+
+# Cached query embeddings are stored as int8: unit-norm components scaled by 127
+QUANT_SCALE = 127
+
+
+def chunk_id(source: str, chunk_index: int) -> str:
+    """
+    ID of an indexed chunk. The zero-padded index keeps IDs of one file in
+    lexicographic file order.
+    """
+    return f"{source}#{chunk_index:06d}"
+
+
+# One HTTP client per server, shared by all RAGClient instances so
+# connections are reused instead of re-established per client
+_HTTP_CLIENTS = {}
+
+
+def _get_http_client(host: str, port: int):
+    """Return the shared ChromaDB HTTP client for host:port."""
+    client = _HTTP_CLIENTS.get((host, port))
+    if client is None:
+        client = _HTTP_CLIENTS[(host, port)] = chromadb.HttpClient(host=host, port=port)
+    return client
+
+
 class RAGClient:
     """Client for querying the codebase vector database."""
     
     def __init__(self, 
                  host: Optional[str] = None,
                  port: Optional[int] = None,
-                 collection_name: str = "dev_stack_codebase"):
+                 collection_name: str = "dev_stack_codebase",
+                 cache_size: int = 128,
+                 cache_ttl: float = 300,
+                 cache_threshold: float = 0.92):
         """
         Initialize RAG client.
         
@@ -24,6 +78,9 @@ class RAGClient:
             host: ChromaDB host (defaults to CHROMA_HOST env var or 'chroma')
             port: ChromaDB port (defaults to CHROMA_PORT env var or 8000)
             collection_name: Name of the collection to query
+            cache_size: Maximum number of cached query results (0 disables the cache)
+            cache_ttl: Seconds a cached result stays valid
+            cache_threshold: Cosine similarity above which a cached query is reused
         """
         self.host = host or os.environ.get("CHROMA_HOST", "chroma")
         self.port = int(port or os.environ.get("CHROMA_PORT", "8000"))
@@ -31,16 +88,35 @@ class RAGClient:
         self.client = None
         self.collection = None
         
+        # Semantic query cache. Entries live in fixed slots: one row of an
+        # int8 embedding matrix plus parallel slot arrays, so a lookup is a
+        # single matrix-vector product and argmax. _cache maps
+        # (scope, query_text) -> slot in LRU order.
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache_threshold = cache_threshold
+        self._cache = OrderedDict()
+        self._cache_mat = None  # (cache_size, dim) int8, allocated on first embedding
+        self._cache_meta = [None] * cache_size  # slot -> (key, results)
+        self._cache_time = np.zeros(cache_size)
+        self._cache_scope_ids = np.full(cache_size, -1, dtype=np.int64)  # -1: free or no embedding
+        self._free_slots = list(range(cache_size - 1, -1, -1))
+        self._scope_ids = {}
+        self._embedding_function = None
+        # find_dependencies query text -> embedding; module queries repeat
+        # constantly, so they are embedded once per client, not per call
+        self._dep_emb_cache = {}
+        
     def connect(self):
         """Establish connection to ChromaDB."""
         try:
-            self.client = chromadb.HttpClient(host=self.host, port=self.port)
+            self.client = _get_http_client(self.host, self.port)
             self.collection = self.client.get_collection(name=self.collection_name)
+            logger.info("Connected to ChromaDB at %s:%s", self.host, self.port)
             return True
         except Exception as e:
-            print(f"Warning: Could not connect to ChromaDB at {self.host}:{self.port}")
-            print(f"Error: {e}")
-            print("RAG features will be disabled. Run: docker compose up -d chroma")
+            logger.warning("Could not connect to ChromaDB at %s:%s: %s", self.host, self.port, e)
+            logger.warning("RAG features will be disabled. Run: docker compose up -d chroma")
             return False
     
     def query(self, 
@@ -62,33 +138,238 @@ class RAGClient:
                 - chunk_index: Position in file
                 - distance: Similarity score (lower is better)
         """
+        return self.multi_query([query_text], n_results=n_results, filter_metadata=filter_metadata)[0]
+    
+    def multi_query(self,
+                    queries: List[str],
+                    n_results: int = 5,
+                    filter_metadata: Optional[Dict] = None) -> List[List[Dict]]:
+        """
+        Run several queries in a single ChromaDB round-trip.
+        
+        Queries answered by the cache are not sent to ChromaDB.
+        
+        Args:
+            queries: Natural language queries or code descriptions
+            n_results: Number of results to return per query
+            filter_metadata: Optional metadata filters applied to every query
+            
+        Returns:
+            One result list per query, in order (same format as query())
+        """
+        scope, results, embeddings, misses = self._check_cache(queries, n_results, filter_metadata)
+        if not misses:
+            return results
+        
         if not self.collection:
             if not self.connect():
-                return []
+                return self._fill_missing(results)
         
         try:
-            results = self.collection.query(
-                query_texts=[query_text],
-                n_results=n_results,
-                where=filter_metadata
+            response = self.collection.query(
+                **self._query_params(queries, embeddings, misses, n_results, filter_metadata)
             )
-            
-            # Format results
-            formatted_results = []
-            if results and results['documents']:
-                for i in range(len(results['documents'][0])):
-                    formatted_results.append({
-                        'content': results['documents'][0][i],
-                        'source': results['metadatas'][0][i].get('source', 'unknown'),
-                        'chunk_index': results['metadatas'][0][i].get('chunk_index', 0),
-                        'distance': results['distances'][0][i] if results['distances'] else 0
-                    })
-            
-            return formatted_results
+            return self._collect_results(scope, queries, embeddings, misses, response, results)
             
         except Exception as e:
-            print(f"Error querying ChromaDB: {e}")
-            return []
+            logger.error("Error querying ChromaDB: %s", e)
+            return self._fill_missing(results)
+    
+    def _check_cache(self, queries: List[str], n_results: int, filter_metadata: Optional[Dict]):
+        """
+        Answer what we can from the cache.
+        
+        Returns:
+            (scope, results, embeddings, misses) where results holds None for
+            every query index listed in misses
+        """
+        scope, results, embeddings, unmatched = self._check_exact_cache(queries, n_results, filter_metadata)
+        self._embed_queries(queries, unmatched, embeddings)
+        return self._check_similar_cache(scope, results, embeddings, unmatched)
+    
+    def _check_exact_cache(self, queries: List[str], n_results: int, filter_metadata: Optional[Dict]):
+        """
+        First half of _check_cache: identical cached queries.
+        
+        Returns:
+            (scope, results, embeddings, unmatched) where unmatched lists the
+            query indexes still to be embedded and looked up by similarity
+        """
+        scope = self._cache_scope(n_results, filter_metadata)
+        results = [None] * len(queries)
+        embeddings = [None] * len(queries)
+        unmatched = []
+        
+        if self.cache_size > 0:
+            for i, query_text in enumerate(queries):
+                cached = self._cache_get_exact(scope, query_text)
+                if cached is None:
+                    unmatched.append(i)
+                else:
+                    results[i] = list(cached)
+        return scope, results, embeddings, unmatched
+    
+    def _embed_queries(self, queries: List[str], indexes: List[int], embeddings: List):
+        """Fill in embeddings for the given query indexes."""
+        for i in indexes:
+            embeddings[i] = self._embed_query(queries[i])
+    
+    def _check_similar_cache(self, scope, results, embeddings, unmatched):
+        """Second half of _check_cache: similar cached queries, by embedding."""
+        for i in unmatched:
+            if embeddings[i] is not None:
+                cached = self._cache_get_similar(scope, embeddings[i])
+                if cached is not None:
+                    results[i] = list(cached)
+        
+        misses = [i for i, result in enumerate(results) if result is None]
+        return scope, results, embeddings, misses
+    
+    @staticmethod
+    def _query_params(queries, embeddings, misses, n_results, filter_metadata) -> Dict:
+        """Build collection.query() arguments for the cache misses."""
+        params = {"n_results": n_results, "where": filter_metadata}
+        if all(embeddings[i] is not None for i in misses):
+            # Reuse the local embeddings instead of embedding again server-side
+            params["query_embeddings"] = [embeddings[i].tolist() for i in misses]
+        else:
+            params["query_texts"] = [queries[i] for i in misses]
+        return params
+    
+    def _collect_results(self, scope, queries, embeddings, misses, response, results) -> List[List[Dict]]:
+        """Merge a ChromaDB response for the misses into results and cache it."""
+        for j, i in enumerate(misses):
+            formatted_results = self._format_query_results(response, j)
+            if self.cache_size > 0:
+                self._cache_put(scope, queries[i], embeddings[i], formatted_results)
+            results[i] = list(formatted_results)
+        return results
+    
+    @staticmethod
+    def _fill_missing(results: List[Optional[List[Dict]]]) -> List[List[Dict]]:
+        """Replace unanswered queries with empty result lists."""
+        return [result if result is not None else [] for result in results]
+    
+    def batch(self) -> "QueryBatch":
+        """
+        Collect queries and send them together when the block exits.
+        
+        Example:
+            with rag.batch() as b:
+                similar = rag.find_similar_implementations("login form", batch=b)
+                deps = rag.find_dependencies("auth", batch=b)
+            # similar and deps are filled in here
+        """
+        return QueryBatch(self)
+    
+    @staticmethod
+    def _format_query_results(results: Dict, i: int) -> List[Dict]:
+        """Convert the i-th query of a ChromaDB query response into result dicts."""
+        formatted_results = []
+        if results and results['documents']:
+            documents = results['documents'][i]
+            metadatas = results['metadatas'][i]
+            distances = results['distances'][i] if results['distances'] else None
+            for j in range(len(documents)):
+                formatted_results.append({
+                    'content': documents[j],
+                    'source': metadatas[j].get('source', 'unknown'),
+                    'chunk_index': metadatas[j].get('chunk_index', 0),
+                    'distance': distances[j] if distances else 0
+                })
+        return formatted_results
+    
+    def _cache_scope(self, n_results: int, filter_metadata: Optional[Dict]) -> tuple:
+        """Cached results are only reused for the same collection, filter and result count."""
+        filter_key = json.dumps(filter_metadata, sort_keys=True) if filter_metadata else ""
+        return (self.collection_name, filter_key, n_results)
+    
+    def _embed_query(self, query_text: str) -> Optional[np.ndarray]:
+        """
+        Embed a query locally with Chroma's default embedding function.
+        
+        Returns:
+            L2-normalized embedding, or None if embeddings are unavailable
+        """
+        if query_text in self._dep_emb_cache:
+            return self._dep_emb_cache[query_text]
+        if self._embedding_function is False:
+            return None
+        try:
+            if self._embedding_function is None:
+                from chromadb.utils import embedding_functions
+                self._embedding_function = embedding_functions.DefaultEmbeddingFunction()
+            embedding = np.asarray(self._embedding_function([query_text])[0], dtype=np.float32)
+        except Exception as e:
+            logger.warning("Query embedding unavailable, caching exact queries only: %s", e)
+            self._embedding_function = False
+            return None
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+    
+    @staticmethod
+    def _quantize(embedding: np.ndarray) -> np.ndarray:
+        """Quantize a normalized embedding to int8 (4x smaller than float32)."""
+        return np.round(embedding * QUANT_SCALE).astype(np.int8)
+    
+    def _cache_get_exact(self, scope: tuple, query_text: str) -> Optional[List[Dict]]:
+        """Return cached results for an identical query, if still fresh."""
+        key = (scope, query_text)
+        slot = self._cache.get(key)
+        if slot is None:
+            return None
+        if time.time() - self._cache_time[slot] > self.cache_ttl:
+            self._cache_evict(key)
+            return None
+        self._cache.move_to_end(key)
+        return self._cache_meta[slot][1]
+    
+    def _cache_get_similar(self, scope: tuple, query_embedding: np.ndarray) -> Optional[List[Dict]]:
+        """Return cached results for the most similar fresh query above the threshold."""
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is None or self._cache_mat is None:
+            return None
+        
+        # int8 dot products accumulated in int32 (384 * 127^2 overflows int16)
+        scores = self._cache_mat.astype(np.int32) @ self._quantize(query_embedding).astype(np.int32)
+        valid = (self._cache_scope_ids == scope_id) & (time.time() - self._cache_time <= self.cache_ttl)
+        scores = np.where(valid, scores, np.iinfo(np.int32).min)
+        best = int(np.argmax(scores))
+        if not valid[best] or scores[best] < self.cache_threshold * QUANT_SCALE * QUANT_SCALE:
+            return None
+        
+        key, results = self._cache_meta[best]
+        self._cache.move_to_end(key)
+        return results
+    
+    def _cache_put(self, scope: tuple, query_text: str,
+                   query_embedding: Optional[np.ndarray], results: List[Dict]):
+        """Store query results, evicting the least recently used entry when full."""
+        key = (scope, query_text)
+        slot = self._cache.get(key)
+        if slot is None:
+            if not self._free_slots:
+                self._cache_evict(next(iter(self._cache)))
+            slot = self._free_slots.pop()
+        
+        self._cache[key] = slot
+        self._cache.move_to_end(key)
+        self._cache_meta[slot] = (key, results)
+        self._cache_time[slot] = time.time()
+        if query_embedding is None:
+            self._cache_scope_ids[slot] = -1
+            return
+        if self._cache_mat is None:
+            self._cache_mat = np.zeros((self.cache_size, len(query_embedding)), dtype=np.int8)
+        self._cache_mat[slot] = self._quantize(query_embedding)
+        self._cache_scope_ids[slot] = self._scope_ids.setdefault(scope, len(self._scope_ids))
+    
+    def _cache_evict(self, key: tuple):
+        """Remove an entry and free its slot."""
+        slot = self._cache.pop(key)
+        self._cache_meta[slot] = None
+        self._cache_scope_ids[slot] = -1
+        self._free_slots.append(slot)
     
     def format_for_llm(self, results: List[Dict], max_length: int = 4000) -> str:
         """
@@ -104,74 +385,149 @@ class RAGClient:
         if not results:
             return "No relevant code found in codebase."
         
-        formatted = "## Relevant Code from Codebase\n\n"
-        current_length = len(formatted)
+        header = "## Relevant Code from Codebase\n\n"
+        buf = io.StringIO()
+        buf.write(header)
+        current_length = len(header)
         
         for i, result in enumerate(results):
-            snippet = f"### Source: {result['source']}\n"
-            snippet += f"```\n{result['content']}\n```\n\n"
-            
-            if current_length + len(snippet) > max_length:
-                formatted += f"... (truncated {len(results) - i} more results)\n"
+            # Size the snippet before building it so skipped ones are never materialized
+            snippet_length = len(result['source']) + len(result['content']) + SNIPPET_OVERHEAD
+            if current_length + snippet_length > max_length:
+                buf.write(f"... (truncated {len(results) - i} more results)\n")
                 break
             
-            formatted += snippet
-            current_length += len(snippet)
+            buf.write(f"### Source: {result['source']}\n")
+            buf.write(f"```\n{result['content']}\n```\n\n")
+            current_length += snippet_length
         
-        return formatted
+        return buf.getvalue()
     
     def find_similar_implementations(self, 
                                      description: str, 
-                                     n_results: int = 3) -> List[Dict]:
+                                     n_results: int = 3,
+                                     batch: Optional["QueryBatch"] = None) -> List[Dict]:
         """
         Find similar code implementations for a given task description.
         
         Args:
             description: Task description or feature requirement
             n_results: Number of similar implementations to find
+            batch: Optional batch from batch(); results are filled in on exit
             
         Returns:
             List of similar code snippets
         """
-        return self.query(description, n_results=n_results)
+        return self._query_or_defer(batch, description, n_results=n_results)
     
     def find_dependencies(self, 
                          file_or_module: str, 
-                         n_results: int = 10) -> List[Dict]:
+                         n_results: int = 10,
+                         batch: Optional["QueryBatch"] = None) -> List[Dict]:
         """
         Find code that imports or uses a specific file/module.
         
         Args:
             file_or_module: Name of file or module to search for
             n_results: Number of results to return
+            batch: Optional batch from batch(); results are filled in on exit
             
         Returns:
             List of code snippets that reference the file/module
         """
-        query = f"import {file_or_module} from {file_or_module} {file_or_module}."
-        return self.query(query, n_results=n_results)
+        query = self._dependency_query(file_or_module)
+        self._pin_dependency_embedding(query)
+        return self._query_or_defer(batch, query, n_results=n_results)
+    
+    @staticmethod
+    def _dependency_query(file_or_module: str) -> str:
+        return f"import {file_or_module} from {file_or_module} {file_or_module}."
+    
+    def _pin_dependency_embedding(self, query: str):
+        """Keep the embedding of a dependency query for reuse by later calls."""
+        if self.cache_size > 0 and query not in self._dep_emb_cache:
+            embedding = self._embed_query(query)
+            if embedding is not None:
+                self._dep_emb_cache[query] = embedding
     
     def search_by_functionality(self, 
                                functionality: str, 
                                file_pattern: Optional[str] = None,
-                               n_results: int = 5) -> List[Dict]:
+                               n_results: int = 5,
+                               batch: Optional["QueryBatch"] = None) -> List[Dict]:
         """
         Search for code implementing specific functionality.
         
         Args:
             functionality: Description of what the code should do
-            file_pattern: Optional file pattern to filter (e.g., "*.py")
+            file_pattern: Optional file pattern to filter. Glob support is limited
+                to "*.ext", "**/*.ext", "dir/*" and "dir/*.ext", which map to
+                indexed equality filters on the extension/dir metadata; other
+                patterns fall back to a substring match on the source path.
+                Collections indexed before the extension/dir metadata existed
+                match nothing on those filters: unbatched queries then retry
+                with the substring match, batched ones need a reindex
+                (python scripts/embed_codebase.py).
             n_results: Number of results to return
+            batch: Optional batch from batch(); results are filled in on exit
             
         Returns:
             List of code snippets implementing the functionality
         """
-        filter_meta = None
-        if file_pattern:
-            # This is a simple filter - ChromaDB supports more complex filters
-            filter_meta = {"source": {"$contains": file_pattern.replace("*", "")}}
+        filter_meta = self._pattern_to_filter(file_pattern) if file_pattern else None
         
-        return self.query(functionality, n_results=n_results, filter_metadata=filter_meta)
+        results = self._query_or_defer(batch, functionality, n_results=n_results, filter_metadata=filter_meta)
+        fallback = self._legacy_fallback_filter(file_pattern, filter_meta)
+        if batch is None and not results and fallback is not None:
+            results = self.query(functionality, n_results=n_results, filter_metadata=fallback)
+        return results
+    
+    @staticmethod
+    def _substring_filter(file_pattern: str) -> Dict:
+        return {"source": {"$contains": file_pattern.replace("*", "")}}
+    
+    @classmethod
+    def _legacy_fallback_filter(cls, file_pattern: Optional[str], filter_meta: Optional[Dict]) -> Optional[Dict]:
+        """
+        Substring filter to retry with when an extension/dir filter found
+        nothing, which is what an index without that metadata returns.
+        """
+        if not filter_meta or "source" in filter_meta:
+            return None
+        pattern = file_pattern
+        if pattern.startswith("**/"):
+            pattern = pattern[3:]
+        return cls._substring_filter(pattern)
+    
+    @staticmethod
+    def _pattern_to_filter(file_pattern: str) -> Optional[Dict]:
+        """Translate a simple glob into a ChromaDB metadata filter."""
+        pattern = file_pattern.replace("\\", "/")
+        if pattern.startswith("./"):
+            pattern = pattern[2:]
+        if pattern.startswith("**/"):
+            # Any directory: only the file name part constrains the match
+            pattern = pattern[3:]
+        directory, name = posixpath.split(pattern)
+        conditions = []
+        # Only single extensions are indexed ("*.test.js" is stored as "js")
+        if name.startswith("*.") and "*" not in name[2:] and "." not in name[2:]:
+            conditions.append({"extension": name[2:]})
+        elif name != "*":
+            return RAGClient._substring_filter(file_pattern)
+        if directory:
+            if "*" in directory:
+                return RAGClient._substring_filter(file_pattern)
+            conditions.append({"dir": directory})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+    
+    def _query_or_defer(self, batch: Optional["QueryBatch"], query_text: str, **kwargs) -> List[Dict]:
+        """Run a query now, or add it to a batch if one is given."""
+        if batch is not None:
+            return batch.query(query_text, **kwargs)
+        return self.query(query_text, **kwargs)
     
     def get_file_context(self, file_path: str, max_chunks: int = 10) -> List[Dict]:
         """
@@ -189,27 +545,230 @@ class RAGClient:
                 return []
         
         try:
-            # Query for all chunks from this file
+            # Chunk IDs are deterministic, so fetch the first max_chunks directly
             results = self.collection.get(
-                where={"source": file_path},
-                limit=max_chunks
+                ids=[chunk_id(file_path, i) for i in range(max_chunks)],
+                include=['documents', 'metadatas']
             )
             
-            formatted_results = []
-            if results and results['documents']:
-                for i in range(len(results['documents'])):
-                    formatted_results.append({
-                        'content': results['documents'][i],
-                        'source': results['metadatas'][i].get('source', 'unknown'),
-                        'chunk_index': results['metadatas'][i].get('chunk_index', 0)
-                    })
+            return self._format_file_chunks(results)
+            
+        except Exception as e:
+            logger.error("Error getting file context: %s", e)
+            return []
+    
+    @staticmethod
+    def _format_file_chunks(results: Dict) -> List[Dict]:
+        """Convert a ChromaDB get() response into result dicts in file order."""
+        formatted_results = []
+        if results and results['documents']:
+            # Zero-padded chunk IDs sort lexicographically in file order
+            ids = results['ids']
+            for i in sorted(range(len(ids)), key=ids.__getitem__):
+                formatted_results.append({
+                    'content': results['documents'][i],
+                    'source': results['metadatas'][i].get('source', 'unknown'),
+                    'chunk_index': results['metadatas'][i].get('chunk_index', 0)
+                })
+        return formatted_results
+
+
+class QueryBatch:
+    """
+    Accumulates queries and sends them in as few ChromaDB round-trips as possible.
+    
+    query() returns an empty list immediately; it is filled in place when the
+    batch is flushed (on leaving the with block).
+    """
+    
+    def __init__(self, rag: RAGClient):
+        self.rag = rag
+        self._pending = []
+    
+    def query(self,
+              query_text: str,
+              n_results: int = 5,
+              filter_metadata: Optional[Dict] = None) -> List[Dict]:
+        """Queue a query; the returned list is populated on flush()."""
+        results = []
+        self._pending.append((query_text, n_results, filter_metadata, results))
+        return results
+    
+    def _take_groups(self):
+        """Empty the queue, grouping queries by n_results/filter."""
+        groups = {}
+        for query_text, n_results, filter_metadata, results in self._pending:
+            key = self.rag._cache_scope(n_results, filter_metadata)
+            groups.setdefault(key, (n_results, filter_metadata, []))[2].append((query_text, results))
+        self._pending = []
+        return groups.values()
+    
+    def flush(self):
+        """Send queued queries, one multi_query per distinct n_results/filter."""
+        for n_results, filter_metadata, entries in self._take_groups():
+            responses = self.rag.multi_query([query_text for query_text, _ in entries],
+                                             n_results=n_results,
+                                             filter_metadata=filter_metadata)
+            for (_, results), response in zip(entries, responses):
+                results.extend(response)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        return False
+
+
+class AsyncQueryBatch(QueryBatch):
+    """QueryBatch for AsyncRAGClient; use it with async with."""
+    
+    async def flush(self):
+        """Send queued queries, one multi_query per distinct n_results/filter, concurrently."""
+        groups = list(self._take_groups())
+        responses = await asyncio.gather(*(
+            self.rag.multi_query([query_text for query_text, _ in entries],
+                                 n_results=n_results,
+                                 filter_metadata=filter_metadata)
+            for n_results, filter_metadata, entries in groups
+        ))
+        for (_, _, entries), group_responses in zip(groups, responses):
+            for (_, results), response in zip(entries, group_responses):
+                results.extend(response)
+    
+    def __enter__(self):
+        raise TypeError("Use 'async with' with AsyncQueryBatch")
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.flush()
+        return False
+
+
+class AsyncRAGClient(RAGClient):
+    """
+    Asyncio variant of RAGClient built on chromadb.AsyncHttpClient.
+    
+    Lets concurrent agent workloads overlap ChromaDB requests. Create one
+    instance per event loop and reuse it so its connection pool is shared.
+    Methods that issue requests are coroutines. Query embeddings are
+    computed in a worker thread so they do not block the event loop.
+    """
+    
+    async def connect(self):
+        """Establish connection to ChromaDB."""
+        try:
+            self.client = await chromadb.AsyncHttpClient(host=self.host, port=self.port)
+            self.collection = await self.client.get_collection(name=self.collection_name)
+            logger.info("Connected to ChromaDB at %s:%s", self.host, self.port)
+            return True
+        except Exception as e:
+            logger.warning("Could not connect to ChromaDB at %s:%s: %s", self.host, self.port, e)
+            logger.warning("RAG features will be disabled. Run: docker compose up -d chroma")
+            return False
+    
+    async def query(self,
+                    query_text: str,
+                    n_results: int = 5,
+                    filter_metadata: Optional[Dict] = None) -> List[Dict]:
+        """Query the codebase for relevant code snippets (see RAGClient.query)."""
+        results = await self.multi_query([query_text], n_results=n_results, filter_metadata=filter_metadata)
+        return results[0]
+    
+    async def multi_query(self,
+                          queries: List[str],
+                          n_results: int = 5,
+                          filter_metadata: Optional[Dict] = None) -> List[List[Dict]]:
+        """Run several queries in a single ChromaDB round-trip (see RAGClient.multi_query)."""
+        scope, results, embeddings, unmatched = self._check_exact_cache(queries, n_results, filter_metadata)
+        if unmatched:
+            # Embedding runs model inference; keep it off the event loop
+            await asyncio.to_thread(self._embed_queries, queries, unmatched, embeddings)
+        scope, results, embeddings, misses = self._check_similar_cache(scope, results, embeddings, unmatched)
+        if not misses:
+            return results
+        
+        if not self.collection:
+            if not await self.connect():
+                return self._fill_missing(results)
+        
+        try:
+            response = await self.collection.query(
+                **self._query_params(queries, embeddings, misses, n_results, filter_metadata)
+            )
+            return self._collect_results(scope, queries, embeddings, misses, response, results)
             
-            # Sort by chunk_index
-            formatted_results.sort(key=lambda x: x['chunk_index'])
-            return formatted_results
+        except Exception as e:
+            logger.error("Error querying ChromaDB: %s", e)
+            return self._fill_missing(results)
+    
+    def batch(self) -> "AsyncQueryBatch":
+        """
+        Collect queries and send them together when the block exits.
+        
+        Example:
+            async with rag.batch() as b:
+                similar = await rag.find_similar_implementations("login form", batch=b)
+                deps = await rag.find_dependencies("auth", batch=b)
+            # similar and deps are filled in here
+        """
+        return AsyncQueryBatch(self)
+    
+    async def find_similar_implementations(self,
+                                           description: str,
+                                           n_results: int = 3,
+                                           batch: Optional["AsyncQueryBatch"] = None) -> List[Dict]:
+        """Find similar code implementations for a given task description."""
+        return await self._query_or_defer(batch, description, n_results=n_results)
+    
+    async def find_dependencies(self,
+                                file_or_module: str,
+                                n_results: int = 10,
+                                batch: Optional["AsyncQueryBatch"] = None) -> List[Dict]:
+        """Find code that imports or uses a specific file/module (see RAGClient.find_dependencies)."""
+        query = self._dependency_query(file_or_module)
+        await asyncio.to_thread(self._pin_dependency_embedding, query)
+        return await self._query_or_defer(batch, query, n_results=n_results)
+    
+    async def search_by_functionality(self,
+                                      functionality: str,
+                                      file_pattern: Optional[str] = None,
+                                      n_results: int = 5,
+                                      batch: Optional["AsyncQueryBatch"] = None) -> List[Dict]:
+        """Search for code implementing specific functionality (see RAGClient.search_by_functionality)."""
+        filter_meta = self._pattern_to_filter(file_pattern) if file_pattern else None
+        
+        results = await self._query_or_defer(batch, functionality, n_results=n_results, filter_metadata=filter_meta)
+        fallback = self._legacy_fallback_filter(file_pattern, filter_meta)
+        if batch is None and not results and fallback is not None:
+            results = await self.query(functionality, n_results=n_results, filter_metadata=fallback)
+        return results
+    
+    async def _query_or_defer(self, batch: Optional["AsyncQueryBatch"], query_text: str, **kwargs) -> List[Dict]:
+        """Run a query now, or add it to a batch if one is given."""
+        if batch is not None:
+            return batch.query(query_text, **kwargs)
+        return await self.query(query_text, **kwargs)
+    
+    async def get_file_context(self, file_path: str, max_chunks: int = 10) -> List[Dict]:
+        """Get all indexed chunks for a specific file, in order."""
+        if not self.collection:
+            if not await self.connect():
+                return []
+        
+        try:
+            results = await self.collection.get(
+                ids=[chunk_id(file_path, i) for i in range(max_chunks)],
+                include=['documents', 'metadatas']
+            )
+            return self._format_file_chunks(results)
             
         except Exception as e:
-            print(f"Error getting file context: {e}")
+            logger.error("Error getting file context: %s", e)
             return []
 
 
@@ -233,6 +792,8 @@ if __name__ == "__main__":
     # Test the RAG client
     import sys
     
+    logging.basicConfig(format="%(levelname)s: %(message)s")
+    
     if len(sys.argv) < 2:
         print("Usage: python rag_client.py <search query>")
         sys.exit(1)
@@ -1,6 +1,8 @@
 import json
 import sys
+import tempfile
 from datetime import datetime
+from string import Template
 
 # Configuration
 import os
@@ -12,13 +14,37 @@ TASKS_JSON = os.path.join(PROJECT_ROOT, "tasks.json")
 OUTPUT_MD = os.path.join(PROJECT_ROOT, "docs", "tasks.md")
 
 
+# Compiled once; substitute() does a single pass per task
+TASK_TEMPLATE = Template("""### ${id}: ${title}
+
+**Status**: ${status}
+**Assigned**: ${assigned}
+**Priority**: ${priority}
+**Created**: ${created}
+**Dependencies**: ${deps}
+
+**Description**:
+${description}
+
+**Acceptance Criteria**:
+${criteria}
+**Technical Notes**:
+${technical_notes}
+
+**Files Changed**:
+${files}
+---
+
+""")
+
+
 def load_tasks():
     with open(TASKS_JSON, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
-def render_header(metadata):
-    return """# Tasks Documentation
+def render_header(out, metadata):
+    out.write("""# Tasks Documentation
 
 **⚠️ IMPORTANT:** This file is AUTO-GENERATED from `tasks.json`. Do not edit manually.
 
@@ -44,56 +70,45 @@ def render_header(metadata):
 
 ## Active Tasks
 
-"""
+""")
 
 
-def render_task(task):
+def render_task(out, task):
     # Determine if task is completed to hide it from active list or show in archive
     # For now, we render all tasks in the list, but you could filter.
 
     deps = ", ".join(task.get("dependencies", [])) if task.get("dependencies") else "None"
 
-    md = f"""### {task['id']}: {task['title']}
-
-**Status**: {task['status']}
-**Assigned**: {task['assigned']}
-**Priority**: {task.get('priority', 'Medium')}
-**Created**: {task.get('created', '')}
-**Dependencies**: {deps}
-
-**Description**:
-{task.get('description', '')}
-
-**Acceptance Criteria**:
-"""
-
-    for criteria in task.get('acceptance_criteria', []):
-        checked = "x" if criteria.get('completed') else " "
-        md += f"- [{checked}] {criteria['description']}\n"
-
-    md += f"""
-**Technical Notes**:
-{task.get('technical_notes', '')}
-
-**Files Changed**:
-"""
-    for f in task.get('files_changed', []):
-        md += f"- {f}\n"
-
-    md += "\n---\n\n"
-    return md
-
-
-def render_backlog(backlog):
-    md = "## Backlog\n\nIdeas and future tasks that are not yet scheduled:\n\n"
+    criteria = "".join(
+        f"- [{'x' if c.get('completed') else ' '}] {c['description']}\n"
+        for c in task.get('acceptance_criteria', [])
+    )
+    files = "".join(f"- {f}\n" for f in task.get('files_changed', []))
+
+    out.write(TASK_TEMPLATE.substitute(
+        id=task['id'],
+        title=task['title'],
+        status=task['status'],
+        assigned=task['assigned'],
+        priority=task.get('priority', 'Medium'),
+        created=task.get('created', ''),
+        deps=deps,
+        description=task.get('description', ''),
+        criteria=criteria,
+        technical_notes=task.get('technical_notes', ''),
+        files=files,
+    ))
+
+
+def render_backlog(out, backlog):
+    out.write("## Backlog\n\nIdeas and future tasks that are not yet scheduled:\n\n")
     for item in backlog:
-        md += f"- {item}\n"
-    md += "\n---\n\n"
-    return md
+        out.write(f"- {item}\n")
+    out.write("\n---\n\n")
 
 
-def render_footer(metadata):
-    return f"""## Notes
+def render_footer(out, metadata):
+    out.write(f"""## Notes
 
 - Always update `tasks.json` when task status changes
 - Keep descriptions clear and actionable
@@ -104,27 +119,51 @@ def render_footer(metadata):
 
 **Last Updated**: {datetime.now().strftime('%Y-%m-%d')}
 **Maintained By**: {metadata.get('maintained_by', '')}
-"""
+""")
 
 
-def main():
-    try:
-        data = load_tasks()
+def render_markdown(out, data):
+    """Write the full tasks.md document for data to the file-like out."""
+    render_header(out, data.get("metadata", {}))
+
+    # Sort tasks: Active first, then Completed
+    tasks = data.get("tasks", [])
+
+    # In a real scenario, you might want to separate completed tasks into an archive section
+    for task in tasks:
+        render_task(out, task)
 
-        markdown = render_header(data.get("metadata", {}))
+    render_backlog(out, data.get("backlog", []))
+    render_footer(out, data.get("metadata", {}))
 
-        # Sort tasks: Active first, then Completed
-        tasks = data.get("tasks", [])
 
-        # In a real scenario, you might want to separate completed tasks into an archive section
-        for task in tasks:
-            markdown += render_task(task)
+def write_markdown(data, path=OUTPUT_MD):
+    # Stream straight into a temp file, then swap it in so readers
+    # never see a half-written document. The temp name is unique, so the
+    # CLI and the watcher's render thread never write the same file.
+    fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tasks-", suffix=".md.tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', buffering=1 << 16) as f:
+            render_markdown(f, data)
+        # mkstemp creates the file 0600; keep the document's usual permissions
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(temp_file, mode)
+        os.replace(temp_file, path)
+    except BaseException:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
 
-        markdown += render_backlog(data.get("backlog", []))
-        markdown += render_footer(data.get("metadata", {}))
 
-        with open(OUTPUT_MD, 'w', encoding='utf-8') as f:
-            f.write(markdown)
+def main():
+    try:
+        data = load_tasks()
+        write_markdown(data)
 
         print(f"Successfully generated {OUTPUT_MD}")
 
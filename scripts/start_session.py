@@ -15,10 +15,20 @@ import os
 import sys
 import subprocess
 import time
+import hashlib
 import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Serializes output from steps that run concurrently
+_print_lock = threading.Lock()
+
+def log(message):
+    with _print_lock:
+        print(message, flush=True)
 
 def print_step(step, message):
-    print(f"\n[{step}/6] {message}...")
+    log(f"\n[{step}/6] {message}...")
 
 def check_env_file():
     print_step(1, "Checking environment configuration")
@@ -28,23 +38,47 @@ def check_env_file():
         sys.exit(1)
     print("✅ .env file found")
 
+def get_requirements_stamp_file():
+    # One stamp per interpreter, so switching venvs triggers a fresh install
+    prefix_hash = hashlib.sha256(sys.prefix.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.expanduser("~"), ".cache", "dev_stack", f"reqs_hash_{prefix_hash}")
+
 def install_dependencies():
     print_step(2, "Installing Python dependencies")
+
+    with open("requirements.txt", "rb") as f:
+        reqs_hash = hashlib.sha256(f.read()).hexdigest()
+    stamp_file = get_requirements_stamp_file()
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
-        print("✅ Dependencies installed")
+        with open(stamp_file, "r", encoding="utf-8") as f:
+            if f.read().strip() == reqs_hash:
+                log("✅ Dependencies up to date")
+                return
+    except OSError:
+        pass
+
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "--disable-pip-version-check", "-q",
+                               "-r", "requirements.txt"])
+        log("✅ Dependencies installed")
     except subprocess.CalledProcessError:
-        print("❌ Failed to install dependencies.")
+        log("❌ Failed to install dependencies.")
         sys.exit(1)
 
+    try:
+        os.makedirs(os.path.dirname(stamp_file), exist_ok=True)
+        with open(stamp_file, "w", encoding="utf-8") as f:
+            f.write(reqs_hash)
+    except OSError as e:
+        log(f"⚠️  Could not record installed requirements: {e}")
+
 def start_docker():
     print_step(3, "Starting Docker services")
     try:
         subprocess.check_call(["docker", "compose", "-f", "docker-compose.yml", "-f", "docker-compose.agents.yml", "up", "-d"])
-        print("✅ Docker services started")
+        log("✅ Docker services started")
     except subprocess.CalledProcessError:
-        print("❌ Failed to start Docker services.")
-        print("Please ensure Docker Desktop is running.")
+        log("❌ Failed to start Docker services.\nPlease ensure Docker Desktop is running.")
         sys.exit(1)
 
 def index_codebase():
@@ -133,8 +167,13 @@ def main():
     os.chdir(project_root)
     
     check_env_file()
-    install_dependencies()
-    start_docker()
+
+    # pip and docker compose are independent; run them side by side
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(install_dependencies), executor.submit(start_docker)]
+        for future in as_completed(futures):
+            future.result()
+
     index_codebase()
     launch_watcher()
     launch_taskmaster()
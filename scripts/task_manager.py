@@ -1,109 +1,418 @@
 import argparse
+import atexit
+import html
 import json
 import sys
 import os
+import threading
+from collections import defaultdict
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Dynamic path resolution
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 REPO_ROOT = os.path.dirname(SCRIPT_DIR)
 TASKS_FILE = os.path.join(REPO_ROOT, "tasks.json")
 VALID_STATUSES = ["TODO", "WIP", "TESTING", "REVIEW", "APPROVED", "COMPLETED", "BLOCKED", "REJECTED"]
 VALID_AGENTS = ["Taskmaster", "Dev1", "Dev2", "Testing", "Review", "DevOps", "Unassigned"]
+VALID_PRIORITIES = ["High", "Medium", "Low"]
+
+
+# Static scaffold of the HTML dashboard; only stats and rows are generated per call
+_HTML_HEAD = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Dev_Stack Dashboard</title>
+        <style>
+            body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; margin: 0; padding: 20px; background: #f5f5f5; }}
+            .container {{ max-width: 1200px; margin: 0 auto; background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
+            h1 {{ color: #333; border-bottom: 2px solid #eee; padding-bottom: 10px; }}
+            .stats {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 20px; margin-bottom: 30px; }}
+            .stat-card {{ background: #f8f9fa; padding: 15px; border-radius: 6px; text-align: center; border: 1px solid #e9ecef; }}
+            .stat-value {{ font-size: 24px; font-weight: bold; color: #007bff; }}
+            .stat-label {{ color: #6c757d; font-size: 14px; }}
+            .task-list {{ width: 100%; border-collapse: collapse; }}
+            th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #eee; }}
+            th {{ background: #f8f9fa; font-weight: 600; }}
+            .status-badge {{ padding: 4px 8px; border-radius: 4px; font-size: 12px; font-weight: bold; }}
+            .status-TODO {{ background: #e9ecef; color: #495057; }}
+            .status-WIP {{ background: #fff3cd; color: #856404; }}
+            .status-TESTING {{ background: #cce5ff; color: #004085; }}
+            .status-REVIEW {{ background: #d4edda; color: #155724; }}
+            .status-APPROVED {{ background: #d1ecf1; color: #0c5460; }}
+            .status-COMPLETED {{ background: #d4edda; color: #155724; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>Dev_Stack Dashboard</h1>
+            <p>Last Updated: {timestamp}</p>
+            
+            <div class="stats">"""
+
+_HTML_TABLE_HEAD = """
+            </div>
+            
+            <h2>Active Tasks</h2>
+            <table class="task-list">
+                <thead>
+                    <tr>
+                        <th>ID</th>
+                        <th>Status</th>
+                        <th>Assigned</th>
+                        <th>Title</th>
+                    </tr>
+                </thead>
+                <tbody>"""
+
+_HTML_FOOT = """
+                </tbody>
+            </table>
+        </div>
+    </body>
+    </html>
+"""
+
+
+# Parsed tasks.json keyed by the file's (mtime_ns, size), so repeated loads
+# in a long-running process skip the read and parse while the file is unchanged.
+# by_id / by_status index the cached tasks and are rebuilt whenever it changes.
+_CACHE = {"stamp": None, "data": None, "by_id": {}, "by_status": {}}
+
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _set_cache(stamp, data):
+    by_id = {}
+    by_status = defaultdict(list)
+    for t in data["tasks"]:
+        by_id[t["id"]] = t
+        by_status[t["status"]].append(t)
+    _CACHE["stamp"] = stamp
+    _CACHE["data"] = data
+    _CACHE["by_id"] = by_id
+    _CACHE["by_status"] = by_status
 
 
 def load_tasks():
-    if not os.path.exists(TASKS_FILE):
-        return {"tasks": [], "backlog": [], "metadata": {}}
+    """
+    Load tasks.json, reusing the cached parse if the file has not changed.
+    Raises ValueError if the file is corrupt.
+
+    The returned dict is shared with the cache: callers that modify it must
+    persist the change with save_tasks().
+    """
+    if _WRITER is not None:
+        # While a background save is queued or in flight the file (and its
+        # temp file) lag behind the cache, so the cache is the only truth
+        data = _WRITER.unsaved_data()
+        if data is not None:
+            return data
     try:
-        with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        print(f"Error: {TASKS_FILE} is corrupt.")
-        sys.exit(1)
+        stamp = _file_stamp(TASKS_FILE)
+    except FileNotFoundError:
+        if not _recover_temp_file():
+            _set_cache(None, {"tasks": [], "backlog": [], "metadata": {"next_id": 1}})
+            return _CACHE["data"]
+        stamp = _file_stamp(TASKS_FILE)
+    if stamp == _CACHE["stamp"]:
+        return _CACHE["data"]
+    try:
+        if orjson is not None:
+            with open(TASKS_FILE, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(TASKS_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+    except json.JSONDecodeError as e:  # orjson.JSONDecodeError subclasses it
+        # Raised rather than exiting so in-process callers (Taskmaster chat) survive
+        raise ValueError(f"{TASKS_FILE} is corrupt: {e}") from e
+    metadata = data.setdefault("metadata", {})
+    if "next_id" not in metadata:
+        # Files written before next_id existed: derive it once from the tasks
+        metadata["next_id"] = _max_task_number(data["tasks"]) + 1
+    _set_cache(stamp, data)
+    return data
+
+
+def _recover_temp_file():
+    """
+    Restore tasks.json from a save that was interrupted before its rename.
+    The temp file is only promoted if it holds complete, valid JSON.
+    """
+    temp_file = TASKS_FILE + ".tmp"
+    try:
+        with open(temp_file, 'r', encoding='utf-8') as f:
+            json.load(f)
+        os.replace(temp_file, TASKS_FILE)
+    except (OSError, ValueError):
+        return False
+    print(f"Recovered {TASKS_FILE} from {temp_file}")
+    return True
+
+
+def get_task(task_id):
+    """Look up a task of the last loaded data by ID."""
+    return _CACHE["by_id"].get(task_id)
 
 
-def save_tasks(data):
-    data["metadata"]["last_updated"] = datetime.now().strftime("%Y-%m-%d")
-    
+def get_tasks_by_status():
+    """Tasks of the last loaded data grouped by status (in file order)."""
+    return _CACHE["by_status"]
+
+
+def _serialize_tasks(data):
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode('utf-8')
+
+
+def _write_tasks(payload):
+    """Atomically replace tasks.json with the serialized payload."""
     # Atomic write to prevent race conditions
     temp_file = TASKS_FILE + ".tmp"
     try:
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        with open(temp_file, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # Only replace tasks.json once the new content is durably on disk
         os.replace(temp_file, TASKS_FILE)
-        print(f"Successfully updated {TASKS_FILE}")
+        return _file_stamp(TASKS_FILE)
     except Exception as e:
         print(f"Error saving tasks: {e}")
         if os.path.exists(temp_file):
             os.remove(temp_file)
+        return None
+
+
+class _TaskWriter(threading.Thread):
+    """
+    Background writer for save_tasks.
+
+    Holds at most one pending snapshot: a newer save replaces one that has
+    not been written yet, since every save rewrites the whole file.
+    """
+
+    def __init__(self):
+        super().__init__(name="tasks-writer", daemon=True)
+        self._cond = threading.Condition()
+        self._pending = None
+        self._busy = False
+
+    def submit(self, data, payload):
+        with self._cond:
+            # Cache and pending snapshot change together, so run() never sees
+            # one without the other. The old stamp is kept until the write lands.
+            _set_cache(_CACHE["stamp"], data)
+            self._pending = payload
+            self._cond.notify_all()
+
+    def unsaved_data(self):
+        """The cached tasks if they are ahead of tasks.json, else None."""
+        with self._cond:
+            if self._pending is not None or self._busy:
+                return _CACHE["data"]
+        return None
+
+    def flush(self):
+        """Block until every submitted snapshot is on disk."""
+        with self._cond:
+            while self._pending is not None or self._busy:
+                self._cond.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                payload, self._pending = self._pending, None
+                self._busy = True
+            stamp = _write_tasks(payload)
+            with self._cond:
+                # A failed write leaves unsaved changes in the cache; force a reload.
+                # Otherwise the cached dict already holds this (or newer) content.
+                _CACHE["stamp"] = stamp
+                self._busy = False
+                self._cond.notify_all()
+
+
+_WRITER = None
+
+
+def enable_background_saves():
+    """
+    Make save_tasks return without waiting for the disk.
+
+    Meant for interactive callers; pending saves are flushed at exit.
+    CLI commands keep writing synchronously.
+    """
+    global _WRITER
+    if _WRITER is None:
+        _WRITER = _TaskWriter()
+        _WRITER.start()
+        atexit.register(_WRITER.flush)
+
+
+def wait_for_saves():
+    """Block until background saves (if enabled) have reached tasks.json."""
+    if _WRITER is not None:
+        _WRITER.flush()
 
 
-def generate_id(tasks):
-    # Find the highest existing ID to prevent collisions
-    existing_ids = []
+def save_tasks(data, now_str=None):
+    data["metadata"]["last_updated"] = now_str or datetime.now().strftime("%Y-%m-%d")
+    # Serializing here snapshots data, so callers may keep mutating it
+    payload = _serialize_tasks(data)
+
+    if _WRITER is not None:
+        # load_tasks returns this data until the write lands
+        _WRITER.submit(data, payload)
+        return
+
+    stamp = _write_tasks(payload)
+    if stamp is None:
+        # The cached dict may hold unsaved changes; force a reload from disk
+        _CACHE["stamp"] = None
+        return
+    _set_cache(stamp, data)
+    print(f"Successfully updated {TASKS_FILE}")
+
+
+def _max_task_number(tasks):
+    # Highest numeric part among the T-NNN ids; 0 if there are none
+    highest = 0
     for t in tasks:
         if t['id'].startswith('T-'):
             try:
-                existing_ids.append(int(t['id'].split('-')[1]))
+                highest = max(highest, int(t['id'].split('-')[1]))
             except ValueError:
                 continue
-    
-    if not existing_ids:
-        next_id = 1
-    else:
-        next_id = max(existing_ids) + 1
+    return highest
+
+
+def generate_id(data):
+    """
+    Allocate the next task ID from metadata["next_id"].
+
+    tasks.json may also be edited by hand, so IDs that are already taken
+    are skipped rather than reused.
+    """
+    next_id = data["metadata"]["next_id"]
+    while f"T-{next_id:03d}" in _CACHE["by_id"]:
+        next_id += 1
+    data["metadata"]["next_id"] = next_id + 1
     return f"T-{next_id:03d}"
 
 
-def add_task(args):
-    if args.assigned not in VALID_AGENTS:
-        print(f"Error: Invalid agent '{args.assigned}'. Valid agents: {', '.join(VALID_AGENTS)}")
-        sys.exit(1)
+def normalize_priority(priority):
+    """Match a priority case-insensitively, falling back to Medium for unknown values."""
+    for valid in VALID_PRIORITIES:
+        if priority.strip().lower() == valid.lower():
+            return valid
+    print(f"Warning: Unknown priority '{priority}', using Medium. Valid priorities: {', '.join(VALID_PRIORITIES)}")
+    return "Medium"
 
-    data = load_tasks()
-    new_id = generate_id(data["tasks"])
 
-    new_task = {
-        "id": new_id,
-        "title": args.title,
+def build_task(task_id, title, assigned="Unassigned", description="", priority="Medium",
+               dependencies=None, technical_notes="", created=None):
+    return {
+        "id": task_id,
+        "title": title,
         "status": "TODO",
-        "assigned": args.assigned,
-        "priority": args.priority,
-        "created": datetime.now().strftime("%Y-%m-%d"),
-        "dependencies": args.dependencies.split(',') if args.dependencies else [],
-        "description": args.description,
+        "assigned": assigned,
+        "priority": priority,
+        "created": created or datetime.now().strftime("%Y-%m-%d"),
+        "dependencies": dependencies or [],
+        "description": description,
         "acceptance_criteria": [],  # Simplified for CLI, agent can edit later
-        "technical_notes": args.technical_notes,
+        "technical_notes": technical_notes,
         "files_changed": []
     }
 
+
+def add_task(args):
+    data = load_tasks()
+    new_id = generate_id(data)
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    new_task = build_task(
+        new_id,
+        args.title,
+        assigned=args.assigned,
+        description=args.description,
+        priority=args.priority,
+        dependencies=args.dependencies.split(',') if args.dependencies else [],
+        technical_notes=args.technical_notes,
+        created=today,
+    )
+
     data["tasks"].insert(0, new_task)  # Add to top
-    save_tasks(data)
+    save_tasks(data, now_str=today)
     print(f"Created Task {new_id}")
+    return new_id
+
+
+def add_tasks_bulk(task_dicts):
+    """
+    Create several tasks with a single load and a single save of tasks.json.
+
+    Each dict takes the keyword arguments of build_task (title required).
+    Returns the new task IDs in input order, None for tasks rejected
+    because of an unknown agent.
+    """
+    data = load_tasks()
+    created_ids = []
+    new_tasks = []
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    for fields in task_dicts:
+        assigned = fields.get("assigned", "Unassigned")
+        if assigned not in VALID_AGENTS:
+            print(f"Error: Invalid agent '{assigned}'. Valid agents: {', '.join(VALID_AGENTS)}")
+            created_ids.append(None)
+            continue
+        if "priority" in fields:
+            # LLM output varies ("high", "Critical"); same rule as the CLI
+            fields = {**fields, "priority": normalize_priority(fields["priority"])}
+        new_id = generate_id(data)
+        new_tasks.append(build_task(new_id, created=today, **fields))
+        created_ids.append(new_id)
+
+    if new_tasks:
+        # Newest first, matching add_task
+        data["tasks"][:0] = reversed(new_tasks)
+        save_tasks(data, now_str=today)
+    return created_ids
 
 
 def update_task(args):
     data = load_tasks()
-    task = next((t for t in data["tasks"] if t["id"] == args.id), None)
+    task = get_task(args.id)
 
     if not task:
         print(f"Error: Task {args.id} not found.")
         sys.exit(1)
 
-    if args.status:
-        if args.status not in VALID_STATUSES:
-            print(f"Error: Invalid status '{args.status}'. Valid statuses: {', '.join(VALID_STATUSES)}")
-            sys.exit(1)
-        task["status"] = args.status
-    if args.assigned:
-        if args.assigned not in VALID_AGENTS:
-            print(f"Error: Invalid agent '{args.assigned}'. Valid agents: {', '.join(VALID_AGENTS)}")
-            sys.exit(1)
-        task["assigned"] = args.assigned
-    if args.priority:
-        task["priority"] = args.priority
+    changes = {
+        field: value
+        for field, value in (("status", args.status), ("assigned", args.assigned), ("priority", args.priority))
+        if value and task.get(field) != value
+    }
+    if not changes:
+        # Rewriting an unchanged file would only wake the watcher for nothing
+        print(f"Task {args.id} already up to date")
+        return
 
+    task.update(changes)
     save_tasks(data)
     print(f"Updated Task {args.id}")
 
@@ -118,135 +427,65 @@ def list_tasks(args):
 
 def generate_report(args):
     data = load_tasks()
-
-    report = f"# Project Status Report - {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n"
-
-    # By Status
-    by_status = {}
-    for t in data["tasks"]:
-        s = t["status"]
-        if s not in by_status:
-            by_status[s] = []
-        by_status[s].append(t)
-
-    # Summary Table
-    report += "## Summary\n\n"
-    report += "| Status | Count |\n"
-    report += "|--------|-------|\n"
+    by_status = get_tasks_by_status()
     order = ["COMPLETED", "APPROVED", "REVIEW", "TESTING", "WIP", "TODO", "BLOCKED"]
-    for status in order:
-        count = len(by_status.get(status, []))
-        report += f"| {status} | {count} |\n"
-    report += "\n"
 
+    # Summary Table; the per-status sections are collected in the same pass
+    parts = [
+        f"# Project Status Report - {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n",
+        "## Summary\n\n",
+        "| Status | Count |\n",
+        "|--------|-------|\n",
+    ]
+    sections = []
     for status in order:
         tasks = by_status.get(status, [])
+        parts.append(f"| {status} | {len(tasks)} |\n")
         if tasks:
-            report += f"## {status} ({len(tasks)})\n"
-            for t in tasks:
-                report += f"- **{t['id']}**: {t['title']} (Assigned: {t['assigned']})\n"
-            report += "\n"
+            sections.append(f"## {status} ({len(tasks)})\n")
+            sections.extend(f"- **{t['id']}**: {t['title']} (Assigned: {t['assigned']})\n" for t in tasks)
+            sections.append("\n")
+    parts.append("\n")
+    parts.extend(sections)
 
     # Backlog
     if data.get("backlog"):
-        report += f"## Backlog ({len(data['backlog'])})\n"
-        for item in data["backlog"]:
-            report += f"- {item}\n"
+        parts.append(f"## Backlog ({len(data['backlog'])})\n")
+        parts.extend(f"- {item}\n" for item in data["backlog"])
 
-    print(report)
+    print("".join(parts))
 
 
 def generate_html_report(args):
     data = load_tasks()
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-    
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Dev_Stack Dashboard</title>
-        <style>
-            body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; margin: 0; padding: 20px; background: #f5f5f5; }}
-            .container {{ max-width: 1200px; margin: 0 auto; background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-            h1 {{ color: #333; border-bottom: 2px solid #eee; padding-bottom: 10px; }}
-            .stats {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 20px; margin-bottom: 30px; }}
-            .stat-card {{ background: #f8f9fa; padding: 15px; border-radius: 6px; text-align: center; border: 1px solid #e9ecef; }}
-            .stat-value {{ font-size: 24px; font-weight: bold; color: #007bff; }}
-            .stat-label {{ color: #6c757d; font-size: 14px; }}
-            .task-list {{ width: 100%; border-collapse: collapse; }}
-            th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #eee; }}
-            th {{ background: #f8f9fa; font-weight: 600; }}
-            .status-badge {{ padding: 4px 8px; border-radius: 4px; font-size: 12px; font-weight: bold; }}
-            .status-TODO {{ background: #e9ecef; color: #495057; }}
-            .status-WIP {{ background: #fff3cd; color: #856404; }}
-            .status-TESTING {{ background: #cce5ff; color: #004085; }}
-            .status-REVIEW {{ background: #d4edda; color: #155724; }}
-            .status-APPROVED {{ background: #d1ecf1; color: #0c5460; }}
-            .status-COMPLETED {{ background: #d4edda; color: #155724; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Dev_Stack Dashboard</h1>
-            <p>Last Updated: {timestamp}</p>
-            
-            <div class="stats">
-    """
-    
+
     # Stats
-    by_status = {}
-    for t in data["tasks"]:
-        s = t["status"]
-        if s not in by_status:
-            by_status[s] = []
-        by_status[s].append(t)
-        
+    by_status = get_tasks_by_status()
     order = ["COMPLETED", "APPROVED", "REVIEW", "TESTING", "WIP", "TODO"]
-    for status in order:
-        count = len(by_status.get(status, []))
-        html += f"""
+    stats = [
+        f"""
             <div class="stat-card">
-                <div class="stat-value">{count}</div>
+                <div class="stat-value">{len(by_status.get(status, []))}</div>
                 <div class="stat-label">{status}</div>
-            </div>
-        """
-        
-    html += """
-            </div>
-            
-            <h2>Active Tasks</h2>
-            <table class="task-list">
-                <thead>
-                    <tr>
-                        <th>ID</th>
-                        <th>Status</th>
-                        <th>Assigned</th>
-                        <th>Title</th>
-                    </tr>
-                </thead>
-                <tbody>
-    """
-    
-    for t in data["tasks"]:
-        html += f"""
+            </div>"""
+        for status in order
+    ]
+
+    rows = [
+        f"""
             <tr>
-                <td>{t['id']}</td>
-                <td><span class="status-badge status-{t['status']}">{t['status']}</span></td>
-                <td>{t['assigned']}</td>
-                <td>{t['title']}</td>
-            </tr>
-        """
-        
-    html += """
-                </tbody>
-            </table>
-        </div>
-    </body>
-    </html>
-    """
-    
+                <td>{html.escape(t['id'])}</td>
+                <td><span class="status-badge status-{html.escape(t['status'])}">{html.escape(t['status'])}</span></td>
+                <td>{html.escape(t['assigned'])}</td>
+                <td>{html.escape(t['title'])}</td>
+            </tr>"""
+        for t in data["tasks"]
+    ]
+
     with open("dashboard.html", "w", encoding="utf-8") as f:
-        f.write(html)
+        f.write(_HTML_HEAD.format(timestamp=timestamp) + "".join(stats)
+                + _HTML_TABLE_HEAD + "".join(rows) + _HTML_FOOT)
     print("Generated dashboard.html")
 
 
@@ -257,8 +496,8 @@ def main():
     # ADD
     add_parser = subparsers.add_parser("add", help="Create a new task")
     add_parser.add_argument("--title", required=True)
-    add_parser.add_argument("--assigned", default="Unassigned")
-    add_parser.add_argument("--priority", default="Medium")
+    add_parser.add_argument("--assigned", default="Unassigned", choices=VALID_AGENTS)
+    add_parser.add_argument("--priority", default="Medium", type=normalize_priority)
     add_parser.add_argument("--dependencies", help="Comma-separated IDs (e.g. T-001,T-002)")
     add_parser.add_argument("--description", default="")
     add_parser.add_argument("--technical-notes", default="", dest="technical_notes")
@@ -267,8 +506,8 @@ def main():
     update_parser = subparsers.add_parser("update", help="Update a task")
     update_parser.add_argument("id", help="Task ID (e.g. T-001)")
     update_parser.add_argument("--status", choices=VALID_STATUSES)
-    update_parser.add_argument("--assigned")
-    update_parser.add_argument("--priority")
+    update_parser.add_argument("--assigned", choices=VALID_AGENTS)
+    update_parser.add_argument("--priority", choices=VALID_PRIORITIES)
 
     # LIST
     subparsers.add_parser("list", help="List all tasks")
@@ -279,19 +518,23 @@ def main():
 
     args = parser.parse_args()
 
-    if args.command == "add":
-        add_task(args)
-    elif args.command == "update":
-        update_task(args)
-    elif args.command == "list":
-        list_tasks(args)
-    elif args.command == "report":
-        if args.html:
-            generate_html_report(args)
+    try:
+        if args.command == "add":
+            add_task(args)
+        elif args.command == "update":
+            update_task(args)
+        elif args.command == "list":
+            list_tasks(args)
+        elif args.command == "report":
+            if args.html:
+                generate_html_report(args)
+            else:
+                generate_report(args)
         else:
-            generate_report(args)
-    else:
-        parser.print_help()
+            parser.print_help()
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -10,35 +10,43 @@ This script provides an interactive chat interface where users can:
 """
 
 import os
+import re
+import signal
 import sys
-import json
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict, deque
 from datetime import datetime
+from itertools import islice
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_ROOT = os.path.dirname(_BASE_DIR)
+_TASKS_FILE = os.path.join(_PROJECT_ROOT, "tasks.json")
 
 # Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _BASE_DIR)
 
 from llm_client import get_llm_client
+from _fastjson import loads
+
+try:
+    import task_manager
+except ImportError:
+    # Tasks are then created by running task_manager.py as a subprocess
+    task_manager = None
 
-def load_env_file():
-    """Load environment variables from .env file."""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(base_dir)
-    env_file = os.path.join(project_root, ".env")
-    
-    if not os.path.exists(env_file):
-        print(f"Warning: .env file not found at {env_file}")
-        return
 
+def _parse_env_file(env_file):
+    """Parse a .env file into a dict without touching os.environ."""
     # Try using python-dotenv if available
     try:
-        from dotenv import load_dotenv
-        load_dotenv(env_file)
-        return
+        from dotenv import dotenv_values
+        return dotenv_values(env_file)
     except ImportError:
         pass
 
     # Fallback: Manual parsing
+    values = {}
     try:
         with open(env_file, 'r', encoding='utf-8') as f:
             for line in f:
@@ -56,28 +64,76 @@ def load_env_file():
                        (value.startswith("'") and value.endswith("'")):
                         value = value[1:-1]
                     
-                    if key and not os.environ.get(key):
-                        os.environ[key] = value
+                    if key:
+                        values[key] = value
     except Exception as e:
         print(f"Error parsing .env file: {e}")
+    return values
+
+
+def load_env_file():
+    """Load environment variables from .env file."""
+    env_file = os.path.join(_PROJECT_ROOT, ".env")
+    
+    if not os.path.exists(env_file):
+        print(f"Warning: .env file not found at {env_file}")
+        return
+
+    # Variables already set in the environment take precedence, even if empty
+    for key, value in _parse_env_file(env_file).items():
+        if value is not None and key not in os.environ:
+            os.environ[key] = value
 
 # Load environment variables before using LLM client
 load_env_file()
 
+# One "Field: value" line of a CREATE_TASK block
+_TASK_FIELD_RE = re.compile(
+    r"^[ \t]*(Title|Assigned|Description|Priority|Technical Notes):[ \t]*(.*?)[ \t\r]*$",
+    re.MULTILINE
+)
+_TASK_FIELD_KEYS = {
+    'Title': 'title',
+    'Assigned': 'assigned',
+    'Description': 'description',
+    'Priority': 'priority',
+    'Technical Notes': 'technical_notes',
+}
+
 
 class TaskmasterChat:
     def __init__(self):
         """Initialize the Taskmaster chat interface."""
-        self.base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.project_root = os.path.dirname(self.base_dir)
-        self.tasks_file = os.path.join(self.project_root, "tasks.json")
-        self.task_manager_script = os.path.join(self.base_dir, "task_manager.py")
+        self.base_dir = _BASE_DIR
+        self.project_root = _PROJECT_ROOT
+        self.tasks_file = _TASKS_FILE
+        self.task_manager_script = os.path.join(_BASE_DIR, "task_manager.py")
+        
+        # LLM client (OpenAI for Taskmaster) is created on the first chat turn,
+        # so status/help do not pay for it
+        self._llm = None
+        
+        # Tasks are created on this worker while the rest of the response streams in;
+        # a single worker keeps tasks.json updates in order
+        self._executor = ThreadPoolExecutor(max_workers=1)
         
-        # Initialize LLM client (using OpenAI for Taskmaster)
-        self.llm = get_llm_client(provider="openai")
+        # Conversation history: at most 10 exchanges and roughly 2k tokens
+        # (~4 chars per token); the oldest exchanges are dropped first
+        self.conversation_history = deque()
+        self._history_chars = 0
+        self._max_history = 20
+        self._char_budget = 8000
         
-        # Conversation history
-        self.conversation_history = []
+        # Task creation should not make the user wait for tasks.json to be written
+        if task_manager is not None:
+            task_manager.enable_background_saves()
+        
+        # Tasks summary is rebuilt only when tasks.json changes
+        self._summary_cache = None
+        self._tasks_mtime = 0
+        # System message wrapping the summary, reused while the summary is unchanged
+        self._tasks_context_msg = None
+        self._tasks_context_summary = None
         
         # System prompt for Taskmaster
         self.system_prompt = """You are the Taskmaster, an AI project manager for a multi-agent development system.
@@ -115,6 +171,16 @@ Technical Notes: [optional technical guidance]
 You can create multiple tasks by repeating the CREATE_TASK block, but ONLY for distinct features.
 
 Be conversational and helpful. Ask clarifying questions if the request is unclear."""
+        
+        # Static head of every request; never mutated, so chat() can concatenate it
+        self._base_messages = [{"role": "system", "content": self.system_prompt}]
+
+    @property
+    def llm(self):
+        """LLM client, created on first use."""
+        if self._llm is None:
+            self._llm = get_llm_client(provider="openai")
+        return self._llm
 
     def print_banner(self):
         """Print welcome banner."""
@@ -132,33 +198,67 @@ Be conversational and helpful. Ask clarifying questions if the request is unclea
 
     def load_tasks(self):
         """Load tasks from tasks.json."""
+        # Tasks created this session may still be queued for writing
+        if task_manager is not None:
+            task_manager.wait_for_saves()
         if not os.path.exists(self.tasks_file):
             return []
         
         try:
-            with open(self.tasks_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(self.tasks_file, 'rb') as f:
+                data = loads(f.read())
                 return data.get('tasks', [])
         except Exception as e:
             print(f"Error loading tasks: {e}")
             return []
 
+    def iter_tasks(self, tasks=None, *, exclude_status=None, limit=None):
+        """Yield tasks (loaded from tasks.json if not given), optionally filtered."""
+        if tasks is None:
+            tasks = self.load_tasks()
+        if exclude_status is not None:
+            tasks = (task for task in tasks if task['status'] != exclude_status)
+        return islice(tasks, limit)
+
     def get_current_tasks_summary(self):
         """Get a summary of current tasks for context."""
+        try:
+            mtime = os.stat(self.tasks_file).st_mtime_ns
+        except OSError:
+            mtime = 0
+        if self._summary_cache is not None and mtime == self._tasks_mtime:
+            return self._summary_cache
+        
         tasks = self.load_tasks()
         
         if not tasks:
-            return "No current tasks."
+            summary_text = "No current tasks."
+        else:
+            summary_text = "\n".join(
+                f"- {task['id']}: {task['title']} ({task['status']}, assigned to {task['assigned']})"
+                for task in self.iter_tasks(tasks, exclude_status='COMPLETED')
+            ) or "All tasks completed!"
         
-        summary = []
-        for task in tasks:
-            if task['status'] != 'COMPLETED':
-                summary.append(f"- {task['id']}: {task['title']} ({task['status']}, assigned to {task['assigned']})")
-        
-        return "\n".join(summary) if summary else "All tasks completed!"
+        self._summary_cache = summary_text
+        self._tasks_mtime = mtime
+        return summary_text
+
+    def _get_tasks_context_msg(self):
+        """The 'Current tasks' system message, rebuilt only when the summary changes."""
+        summary = self.get_current_tasks_summary()
+        # The summary cache hands back the same string object while tasks.json is unchanged
+        if self._tasks_context_msg is None or self._tasks_context_summary is not summary:
+            self._tasks_context_msg = {"role": "system", "content": f"Current tasks:\n{summary}"}
+            self._tasks_context_summary = summary
+        return self._tasks_context_msg
 
     def parse_task_creation(self, response):
-        """Parse task creation commands from LLM response."""
+        """
+        Parse task creation commands from LLM response.
+        
+        Returns (preamble, tasks): the text before the first CREATE_TASK
+        block, for display, and the parsed task dicts.
+        """
         tasks_to_create = []
         
         # Split by CREATE_TASK markers
@@ -174,28 +274,30 @@ Be conversational and helpful. Ask clarifying questions if the request is unclea
                 'technical_notes': ''
             }
             
-            lines = block.split('\n')
-            for line in lines:
-                line = line.strip()
-                if line.startswith('Title:'):
-                    task['title'] = line.replace('Title:', '').strip()
-                elif line.startswith('Assigned:'):
-                    task['assigned'] = line.replace('Assigned:', '').strip()
-                elif line.startswith('Description:'):
-                    task['description'] = line.replace('Description:', '').strip()
-                elif line.startswith('Priority:'):
-                    task['priority'] = line.replace('Priority:', '').strip()
-                elif line.startswith('Technical Notes:'):
-                    task['technical_notes'] = line.replace('Technical Notes:', '').strip()
+            for match in _TASK_FIELD_RE.finditer(block):
+                task[_TASK_FIELD_KEYS[match.group(1)]] = match.group(2)
             
             # Only add if we have at least a title
             if task['title']:
                 tasks_to_create.append(task)
         
-        return tasks_to_create
+        return blocks[0].strip(), tasks_to_create
 
     def create_task(self, title, assigned, description, priority='Medium', technical_notes=''):
-        """Create a task using task_manager.py."""
+        """Create a task using task_manager (in-process, or task_manager.py if it cannot be imported)."""
+        if task_manager is not None:
+            try:
+                return task_manager.add_tasks_bulk([{
+                    'title': title,
+                    'assigned': assigned,
+                    'description': description,
+                    'priority': priority,
+                    'technical_notes': technical_notes
+                }])[0]
+            except ValueError as e:
+                print(f"  ❌ Failed to create task: {e}")
+                return None
+        
         try:
             cmd = [
                 sys.executable,
@@ -224,34 +326,116 @@ Be conversational and helpful. Ask clarifying questions if the request is unclea
             return None
 
     def create_tasks(self, tasks):
-        """Create tasks using task_manager."""
+        """Create tasks using task_manager (one tasks.json write for the batch)."""
         created_tasks = []
         
-        for task in tasks:
-            task_id = self.create_task(
-                title=task['title'],
-                assigned=task['assigned'],
-                description=task['description'],
-                priority=task.get('priority', 'Medium'),
-                technical_notes=task.get('technical_notes', '')
-            )
-            
+        self._summary_cache = None
+        fields = [
+            {
+                'title': task['title'],
+                'assigned': task['assigned'],
+                'description': task['description'],
+                'priority': task.get('priority', 'Medium'),
+                'technical_notes': task.get('technical_notes', '')
+            }
+            for task in tasks
+        ]
+        if task_manager is not None:
+            try:
+                task_ids = task_manager.add_tasks_bulk(fields)
+            except ValueError as e:
+                # e.g. a corrupt tasks.json; fail these tasks, keep the session going
+                print(f"  ❌ {e}")
+                task_ids = [None] * len(fields)
+        else:
+            task_ids = [self.create_task(**task_fields) for task_fields in fields]
+        
+        for task, task_id in zip(tasks, task_ids):
             if task_id:
                 created_tasks.append(task_id)
                 print(f"  ✅ Created {task_id}: {task['title']} → {task['assigned']}")
+            else:
+                print(f"  ❌ Failed to create task: {task['title']}")
         
         return created_tasks
 
-    def chat(self, user_message):
-        """Process a user message and get Taskmaster response."""
-        # Add current tasks context
-        tasks_context = self.get_current_tasks_summary()
+    def _add_to_history(self, user_message, response):
+        """Append an exchange and drop the oldest ones beyond the length/char budget."""
+        history = self.conversation_history
+        history.append({"role": "user", "content": user_message})
+        history.append({"role": "assistant", "content": response})
+        self._history_chars += len(user_message) + len(response)
+        # Drop whole exchanges so the history always opens with a user turn.
+        # Always keep the latest exchange, even if it alone exceeds the budget
+        while len(history) > 2 and (len(history) > self._max_history or self._history_chars > self._char_budget):
+            for _ in range(2):
+                self._history_chars -= len(history.popleft()['content'])
+
+    def _emit_task_blocks(self, text, pos, callback, final=False):
+        """
+        Pass each complete CREATE_TASK block in text[pos:] to callback.
+        Returns the position to resume scanning from once more text arrives.
+        """
+        marker = "CREATE_TASK:"
+        while True:
+            start = text.find(marker, pos)
+            if start < 0:
+                # Only a marker split across chunks can still start in the last few chars
+                return max(pos, len(text) - len(marker) + 1)
+            # A block ends at its "---" line or where the next block starts
+            end = text.find("\n---", start)
+            next_start = text.find(marker, start + len(marker))
+            if next_start >= 0 and (end < 0 or next_start < end):
+                end = next_start
+            if end < 0:
+                if not final:
+                    return start
+                end = len(text)
+            callback(text[start:end])
+            pos = end
+
+    def _emit_reply_text(self, held, on_text, final=False):
+        """
+        Pass the text in held that precedes the first CREATE_TASK block to on_text,
+        followed by None once that text is complete.
+        Returns what to hold back (a possibly split marker), or None when done.
+        """
+        marker = "CREATE_TASK:"
+        cut = held.find(marker)
+        if cut >= 0 or final:
+            on_text(held if cut < 0 else held[:cut])
+            on_text(None)
+            return None
+        keep = min(len(held), len(marker) - 1)
+        on_text(held[:len(held) - keep])
+        return held[len(held) - keep:]
+
+    def _submit_task_block(self, block, futures):
+        """Queue creation of the tasks in one CREATE_TASK block."""
+        _, tasks = self.parse_task_creation(block)
+        if tasks:
+            if not futures:
+                print("\n📝 Creating tasks...\n")
+            futures.append(self._executor.submit(self.create_tasks, tasks))
+
+    def _wait_for_created(self, futures):
+        """Wait for queued task creation and report the created task IDs."""
+        created = [task_id for future in futures for task_id in future.result()]
+        if created:
+            print(f"\n✅ Created {len(created)} task(s): {', '.join(created)}. The watcher will notify agents.\n")
+        return created
+
+    def chat(self, user_message, on_task_block=None, on_text=None):
+        """
+        Process a user message and get Taskmaster response.
         
-        # Build messages for LLM
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "system", "content": f"Current tasks:\n{tasks_context}"}
-        ]
+        The response is streamed. on_text, if given, receives the reply text
+        before the first CREATE_TASK block as it arrives, then None once that
+        text is complete; on_task_block, if
+        given, is called with each CREATE_TASK block as soon as it is complete.
+        """
+        # Build messages for LLM, with current tasks context
+        messages = self._base_messages + [self._get_tasks_context_msg()]
         
         # Add conversation history
         messages.extend(self.conversation_history)
@@ -261,15 +445,35 @@ Be conversational and helpful. Ask clarifying questions if the request is unclea
         
         # Get LLM response
         print("\n🤔 Taskmaster is thinking...\n")
-        response = self.llm.generate_with_messages(messages)
+        chunks = []
+        held = "" if on_text is not None else None
+        tail = ""  # Text not yet scanned for complete task blocks
+        scanned = 0
+        try:
+            for chunk in self.llm.generate_stream_with_messages(messages):
+                chunks.append(chunk)
+                if held is not None:
+                    held = self._emit_reply_text(held + chunk, on_text)
+                if on_task_block is not None:
+                    tail += chunk
+                    pos = self._emit_task_blocks(tail, 0, on_task_block)
+                    scanned += pos
+                    tail = tail[pos:]
+        except Exception:
+            if scanned:
+                # The first scanned chars were fully handled, including any task
+                # blocks already submitted; keep them in the history so a retry
+                # does not make the model emit those tasks again
+                self._add_to_history(user_message, "".join(chunks)[:scanned] + "\n[response interrupted]")
+            raise
+        if held is not None:
+            self._emit_reply_text(held, on_text, final=True)
+        if on_task_block is not None:
+            self._emit_task_blocks(tail, 0, on_task_block, final=True)
+        response = "".join(chunks)
         
         # Update conversation history
-        self.conversation_history.append({"role": "user", "content": user_message})
-        self.conversation_history.append({"role": "assistant", "content": response})
-        
-        # Keep history manageable (last 10 exchanges)
-        if len(self.conversation_history) > 20:
-            self.conversation_history = self.conversation_history[-20:]
+        self._add_to_history(user_message, response)
         
         return response
 
@@ -286,19 +490,18 @@ Be conversational and helpful. Ask clarifying questions if the request is unclea
             return
         
         # Group by status
-        by_status = {}
+        by_status = defaultdict(list)
         for task in tasks:
-            status = task['status']
-            if status not in by_status:
-                by_status[status] = []
-            by_status[status].append(task)
+            by_status[task['status']].append(task)
         
         # Display
-        for status in ['TODO', 'WIP', 'TESTING', 'REVIEW', 'APPROVED', 'COMPLETED']:
-            if status in by_status:
-                print(f"\n{status}:")
-                for task in by_status[status]:
-                    print(f"  {task['id']}: {task['title']} ({task['assigned']})")
+        for status in ('TODO', 'WIP', 'TESTING', 'REVIEW', 'APPROVED', 'COMPLETED'):
+            bucket = by_status.get(status)
+            if bucket:
+                # One write per bucket rather than one print per task
+                print(f"\n{status}:\n" + "\n".join(
+                    f"  {task['id']}: {task['title']} ({task['assigned']})" for task in bucket
+                ))
         
         print("\n" + "="*60 + "\n")
 
@@ -351,23 +554,42 @@ The agents will automatically work on assigned tasks!
                     self.show_help()
                     continue
                 
-                # Get Taskmaster response
-                response = self.chat(user_input)
-                
-                # Parse and create tasks
-                tasks_to_create = self.parse_task_creation(response)
+                # Get Taskmaster response; the reply (without CREATE_TASK blocks)
+                # is printed and tasks are created as the response streams in
+                futures = []
+                reply_started = False
+                trailing_ws = ""  # Held back so the reply ends right above the next output
+
+                def show_text(text):
+                    nonlocal reply_started, trailing_ws
+                    if text is None:
+                        if reply_started:
+                            print("\n")
+                        return
+                    text = trailing_ws + text
+                    visible = text.rstrip()
+                    trailing_ws = text[len(visible):]
+                    if not reply_started:
+                        visible = visible.lstrip()
+                        if not visible:
+                            return
+                        print("🎯 Taskmaster: ", end="")
+                        reply_started = True
+                    print(visible, end="", flush=True)
+
+                try:
+                    self.chat(
+                        user_input,
+                        on_task_block=lambda block: self._submit_task_block(block, futures),
+                        on_text=show_text
+                    )
+                except Exception:
+                    # Blocks completed before the failure are still being created
+                    self._wait_for_created(futures)
+                    raise
                 
-                # Display response (without CREATE_TASK blocks)
-                response_text = response.split("CREATE_TASK:")[0].strip()
-                print(f"\n🎯 Taskmaster: {response_text}\n")
-                
-                # Create tasks if any were specified
-                if tasks_to_create:
-                    print("\n📝 Creating tasks...\n")
-                    created = self.create_tasks(tasks_to_create)
-                    
-                    if created:
-                        print(f"\n✅ Created {len(created)} task(s). The watcher will notify agents.\n")
+                # Wait for the tasks specified in the response
+                self._wait_for_created(futures)
                 
             except KeyboardInterrupt:
                 print("\n\n👋 Goodbye! Your agents will keep working on the tasks.\n")
@@ -379,6 +601,8 @@ The agents will automatically work on assigned tasks!
 
 def main():
     """Main entry point."""
+    # Exit normally on SIGTERM so atexit still flushes queued tasks.json saves
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     chat = TaskmasterChat()
     chat.run()
 
@@ -1,18 +1,36 @@
-import time
 import os
-import json
+import queue
+import shlex
+import signal
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
+import render_tasks
+from _fastjson import loads, JSONDecodeError
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # Configuration
 # Configuration
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
 TASKS_FILE = os.path.join(PROJECT_ROOT, "tasks.json")
-RENDER_SCRIPT = os.path.join(BASE_DIR, "render_tasks.py")
 LOG_DIR = os.path.join(PROJECT_ROOT, "logs")
 POLL_INTERVAL = 2  # seconds
+# Files at least this large are stream-parsed to keep memory flat; below it a
+# full parse is faster (ijson's per-event overhead dominates)
+STREAM_PARSE_MIN_SIZE = 8 * 1024 * 1024
 
 # Ensure log directory exists
 if not os.path.exists(LOG_DIR):
@@ -32,12 +50,12 @@ AGENT_MAPPING = {
 
 def get_file_content(filepath):
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(filepath, 'rb') as f:
+            return loads(f.read())
     except FileNotFoundError:
         print(f"Error: File {filepath} not found.")
         return None
-    except json.JSONDecodeError as e:
+    except JSONDecodeError as e:
         print(f"Error: File {filepath} contains invalid JSON: {e}", file=sys.stderr)
         return None
     except Exception as e:
@@ -65,9 +83,69 @@ def parse_tasks(content):
     return tasks
 
 
-def notify_agent(agent_name, task_info):
+def stream_parse_tasks(filepath):
+    """
+    Yields id/title/status/assigned of each task without materializing the
+    rest of the document (descriptions, notes, backlog).
+    """
+    fields = {f"tasks.item.{key}": key for key in ('id', 'title', 'status', 'assigned')}
+    task = None
+    with open(filepath, 'rb') as f:
+        for prefix, event, value in ijson.parse(f):
+            if prefix == 'tasks.item':
+                if event == 'start_map':
+                    task = {}
+                elif event == 'end_map':
+                    yield task
+                    task = None
+            elif task is not None and prefix in fields:
+                task[fields[prefix]] = value
+
+
+def read_tasks(filepath, size=None):
+    """
+    Returns the watched task fields keyed by task ID, or None if the file
+    could not be read or parsed (e.g. a non-atomic editor is mid-write).
+    Very large files are stream-parsed when ijson is available;
+    pass size if the caller has already stat'ed the file.
+    """
+    if size is None:
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            size = 0
+    if ijson is None or size < STREAM_PARSE_MIN_SIZE:
+        content = get_file_content(filepath)
+        return None if content is None else parse_tasks(content)
+
+    try:
+        return {task['id']: task for task in stream_parse_tasks(filepath)}
+    except ijson.JSONError as e:
+        print(f"Error: File {filepath} contains invalid JSON: {e}", file=sys.stderr)
+    except Exception as e:
+        print(f"Error reading {filepath}: {e}", file=sys.stderr)
+    return None
+
+
+def changed_tasks(current_tasks, last_tasks):
     """
-    Triggers the agent container.
+    Yields (task, old_task) for tasks that are new or whose watched fields
+    changed; old_task is None for new tasks.
+    """
+    if current_tasks == last_tasks:
+        # Common case: the edit touched fields the watcher ignores (descriptions, notes)
+        return
+    for task_id, task in current_tasks.items():
+        old_task = last_tasks.get(task_id)
+        # Whole-row comparison runs in C; unchanged rows are skipped without field checks
+        if task != old_task:
+            yield task, old_task
+
+
+def notify_agent(agent_name, task_info, pending):
+    """
+    Queues a notification for the agent container.
+    Notifications are delivered by send_notifications, one docker exec per container.
     """
     container_name = AGENT_MAPPING.get(agent_name)
     if not container_name:
@@ -78,16 +156,105 @@ def notify_agent(agent_name, task_info):
 
     # Construct the message
     message = f"NEW TASK ASSIGNMENT: {task_info['id']} - {task_info['title']} (Status: {task_info['status']})"
+    pending.setdefault(container_name, []).append(message)
 
-    # Docker exec command
-    # We try to write to a notification file inside the container
-    # and also print to stdout which might be visible if attached
-    cmd = [
-        "docker", "exec", container_name,
-        "sh", "-c",
-        f"echo '{message}' >> /tmp/agent_notifications && echo '{message}'"
-    ]
 
+# Long-lived "docker exec -i <container> sh" sessions, one per container:
+# container -> (process, queue of acknowledgement lines from its stdout)
+_AGENT_PIPES = {}
+NOTIFY_ACK_TIMEOUT = 5  # seconds
+
+
+def _read_acks(proc, acks):
+    for line in iter(proc.stdout.readline, b''):
+        acks.put(line.decode('utf-8', errors='replace').strip())
+    # EOF: the session is gone, wake up anyone waiting for an ack
+    acks.put(None)
+
+
+def _log_session_errors(container_name, proc):
+    for line in iter(proc.stderr.readline, b''):
+        print(f"[{container_name}] {line.decode('utf-8', errors='replace').rstrip()}", file=sys.stderr)
+
+
+def _get_agent_pipe(container_name):
+    """
+    Returns a live (process, acks) shell session in the container,
+    (re)starting it if needed.
+    """
+    session = _AGENT_PIPES.get(container_name)
+    if session is None or session[0].poll() is not None:
+        proc = subprocess.Popen(
+            ["docker", "exec", "-i", container_name, "sh"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        acks = queue.Queue()
+        threading.Thread(target=_read_acks, args=(proc, acks), daemon=True).start()
+        threading.Thread(target=_log_session_errors, args=(container_name, proc), daemon=True).start()
+        session = (proc, acks)
+        _AGENT_PIPES[container_name] = session
+    return session
+
+
+def close_agent_pipes():
+    for proc, _ in _AGENT_PIPES.values():
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+    _AGENT_PIPES.clear()
+
+
+def _send_to_session(container_name, command):
+    """
+    Runs command in the container's shell session and returns its exit
+    status, or None if the session died or did not answer in time.
+    """
+    proc, acks = _get_agent_pipe(container_name)
+    try:
+        proc.stdin.write(f"{command}; echo $?\n".encode('utf-8'))
+        proc.stdin.flush()
+        ack = acks.get(timeout=NOTIFY_ACK_TIMEOUT)
+    except (OSError, queue.Empty):
+        ack = None
+    if ack is None:
+        # Drop the session; a late ack must not be mistaken for the next command's
+        proc.kill()
+        _AGENT_PIPES.pop(container_name, None)
+        return None
+    try:
+        return int(ack)
+    except ValueError:
+        return None
+
+
+def _flush_container(container_name, messages):
+    """
+    Triggers the agent container with all of its queued messages.
+    """
+    # We write to a notification file inside the container through the
+    # container's shell session, so no docker exec is spawned per notification.
+    # Messages contain task titles, so they must be shell-quoted.
+    lines = " ".join(shlex.quote(message) for message in messages)
+    command = f"printf '%s\\n' {lines} >> /tmp/agent_notifications"
+
+    # The shell echoes the command's exit status, so success is only logged
+    # once the write is confirmed. A session that died since the last write
+    # is restarted once.
+    for _ in range(2):
+        status = _send_to_session(container_name, command)
+        if status == 0:
+            print(f"[+] Notification sent to {container_name}")
+            return
+        if status is not None:
+            # The session is fine but the write failed; retrying it won't help
+            break
+
+    # A one-off exec reports why delivery failed
+    cmd = ["docker", "exec", container_name, "sh", "-c", command]
     try:
         subprocess.run(cmd, check=True, capture_output=True)
         print(f"[+] Notification sent to {container_name}")
@@ -95,18 +262,76 @@ def notify_agent(agent_name, task_info):
         print(f"[-] Failed to notify {container_name}: {e}")
 
 
-def update_markdown_view():
+def send_notifications(executor, pending):
     """
-    Runs the render_tasks.py script to update docs/tasks.md
+    Delivers queued notifications, one docker exec per container, in parallel.
     """
+    futures = [
+        executor.submit(_flush_container, container_name, messages)
+        for container_name, messages in pending.items()
+    ]
+    # Wait so a container's messages stay in order across polling ticks
+    wait(futures)
+
+
+def create_file_watch():
+    """
+    Returns an inotify instance watching the tasks.json directory,
+    or None if inotify is unavailable (polling is used instead).
+    """
+    if INotify is None:
+        return None
     try:
-        cmd = [sys.executable, RENDER_SCRIPT]
-        subprocess.run(cmd, check=True, capture_output=True)
+        inotify = INotify()
+        # Watch the directory: tasks.json is replaced by rename on every save
+        inotify.add_watch(PROJECT_ROOT, flags.CLOSE_WRITE | flags.MOVED_TO)
+    except Exception as e:
+        # OSError on Linux (watch limits); non-Linux libcs lack inotify_init1 altogether
+        print(f"inotify unavailable ({e}), polling every {POLL_INTERVAL}s")
+        return None
+    return inotify
+
+
+def wait_for_change(inotify, stop):
+    """
+    Blocks until tasks.json may have changed.
+    Returns False instead if the watcher is asked to stop.
+    """
+    if inotify is None:
+        return not stop.wait(POLL_INTERVAL)
+    tasks_name = os.path.basename(TASKS_FILE)
+    while not stop.is_set():
+        # Time out periodically so a stop request is noticed promptly
+        if any(event.name == tasks_name for event in inotify.read(timeout=1000)):
+            return True
+    return False
+
+
+# Bumped per render request; queued renders that are no longer the latest are skipped
+_render_version = 0
+
+
+def _render_markdown(version):
+    if version != _render_version:
+        # A newer request is queued behind this one and will render the latest file
+        return
+    try:
+        render_tasks.write_markdown(render_tasks.load_tasks())
         print("[+] Updated docs/tasks.md")
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         print(f"[-] Failed to update markdown view: {e}")
 
 
+def update_markdown_view(render_executor):
+    """
+    Re-renders docs/tasks.md in-process on the render thread,
+    so the watcher can go on diffing and notifying meanwhile
+    """
+    global _render_version
+    _render_version += 1
+    render_executor.submit(_render_markdown, _render_version)
+
+
 def main():
     print(f"Starting Watcher for {TASKS_FILE}...")
     print(f"Logging to {LOG_DIR}")
@@ -117,43 +342,65 @@ def main():
     last_mtime = 0
     last_tasks = {}
 
+    # Watch before the initial load so a write landing in between still raises an event
+    inotify = create_file_watch()
+
     # Initial load
-    if os.path.exists(TASKS_FILE):
-        last_mtime = os.path.getmtime(TASKS_FILE)
-        content = get_file_content(TASKS_FILE)
-        last_tasks = parse_tasks(content)
+    try:
+        st = os.stat(TASKS_FILE)
+        last_mtime = st.st_mtime
+        last_tasks = read_tasks(TASKS_FILE, st.st_size) or {}
         print(f"Loaded {len(last_tasks)} tasks. Monitoring for changes...")
-    else:
+    except FileNotFoundError:
         print("Waiting for tasks file to be created...")
 
+    # Created once; each tick fans its notifications out over these threads
+    executor = ThreadPoolExecutor(max_workers=len(AGENT_MAPPING))
+    # Single worker so renders never race on docs/tasks.md
+    render_executor = ThreadPoolExecutor(max_workers=1)
+
+    # Ctrl-C and `docker stop` end the loop cleanly between ticks
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop.set())
+
     try:
-        while True:
-            time.sleep(POLL_INTERVAL)
+        while wait_for_change(inotify, stop):
 
-            if not os.path.exists(TASKS_FILE):
+            # One stat per tick serves the existence check, mtime and size
+            try:
+                st = os.stat(TASKS_FILE)
+            except FileNotFoundError:
                 continue
 
-            current_mtime = os.path.getmtime(TASKS_FILE)
+            # Also dedupes repeated events for the same write
+            current_mtime = st.st_mtime
 
             if current_mtime > last_mtime:
                 print(f"\n[!] Change detected at {datetime.now().strftime('%H:%M:%S')}")
+
+                current_tasks = read_tasks(TASKS_FILE, st.st_size)
+                if current_tasks is None:
+                    # Skip this tick rather than diffing against an empty task list,
+                    # which would re-notify every task once the file is valid again.
+                    # last_mtime is left alone so the next change is picked up.
+                    print("[-] tasks.json could not be parsed; waiting for the next write")
+                    continue
                 last_mtime = current_mtime
 
                 # Update Markdown View
-                update_markdown_view()
-
-                content = get_file_content(TASKS_FILE)
-                current_tasks = parse_tasks(content)
+                update_markdown_view(render_executor)
+                pending = {}  # container -> messages
 
                 # Detect changes
-                for task_id, task in current_tasks.items():
-                    old_task = last_tasks.get(task_id)
+                for task, old_task in changed_tasks(current_tasks, last_tasks):
+                    task_id = task['id']
 
                     if not old_task:
                         print(f"New task detected: {task_id}")
                         # Optionally notify if it's assigned immediately
                         if task['assigned'] != 'UNKNOWN' and task['assigned'] != 'Unassigned':
-                            notify_agent(task['assigned'], task)
+                            notify_agent(task['assigned'], task, pending)
                     else:
                         # Check for relevant changes
                         status_changed = task['status'] != old_task['status']
@@ -171,24 +418,24 @@ def main():
                             if status_changed:
                                 new_status = task['status']
                                 if new_status == "TESTING":
-                                    notify_agent("Testing", task)
+                                    notify_agent("Testing", task, pending)
                                 elif new_status == "REVIEW":
-                                    notify_agent("Review", task)
+                                    notify_agent("Review", task, pending)
                                 elif new_status == "APPROVED":
-                                    notify_agent("DevOps", task)
+                                    notify_agent("DevOps", task, pending)
                                 elif new_status in ["TODO", "WIP"]:
                                     # Notify the assigned dev if status moves back
                                     if task['assigned'] in AGENT_MAPPING:
-                                        notify_agent(task['assigned'], task)
+                                        notify_agent(task['assigned'], task, pending)
                             
                             # Assignment-based routing
                             elif assigned_changed:
                                 if task['assigned'] in AGENT_MAPPING:
-                                    notify_agent(task['assigned'], task)
+                                    notify_agent(task['assigned'], task, pending)
 
+                send_notifications(executor, pending)
                 last_tasks = current_tasks
 
-    except KeyboardInterrupt:
         print("\nStopping Watcher.")
     except Exception as e:
         print(f"CRITICAL ERROR in Watcher: {e}", file=sys.stderr)
@@ -196,6 +443,12 @@ def main():
         # For now, we exit to let Docker restart policy handle it if needed, 
         # but logging is crucial.
         sys.exit(1)
+    finally:
+        executor.shutdown(wait=True)
+        render_executor.shutdown(wait=True)
+        close_agent_pipes()
+        if inotify is not None:
+            inotify.close()
 
 
 if __name__ == "__main__":